@@ -0,0 +1,177 @@
+# batch_render.py
+# Renderização em lote, sem janela: várias malhas .byu x vários arquivos de câmera -> PNGs.
+# Os trabalhos são distribuídos num pool de processos em blocos de (malha, todas as câmeras);
+# cada worker mantém só a malha atual e a reaproveita para as câmeras do bloco.
+#
+# Uso:
+#   python batch_render.py --meshes formas/*.byu --cameras camera.txt cams/*.txt --out renders
+#   (listas longas podem vir de arquivo: --meshes @lista_malhas.txt, um caminho por linha)
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import camera
+import image_io
+import mesh_cache
+import pipeline
+
+# malha atual do processo worker (caminho -> malha, no máximo uma entrada): os trabalhos
+# chegam em ordem malha-major, então guardar as anteriores só acumularia memória
+_worker_meshes = {}
+
+def _load_mesh(path: str):
+    m = _worker_meshes.get(path)
+    if m is None:
+        _worker_meshes.clear()
+        m = mesh_cache.load_mesh_cached(path)
+        _worker_meshes[path] = m
+    return m
+
+def render_job(job):
+    """Renderiza um par (malha, câmera) e grava o PNG. Retorna (png, tempo, erro)."""
+    mesh_path, cam_name, cam, out_path, width, height, opts = job
+    t0 = time.perf_counter()
+    try:
+        m = _load_mesh(mesh_path)
+        framebuffer, _, _ = pipeline.render_frame(
+            m, dict(cam), width, height,
+            use_zbuffer=opts["zbuffer"],
+            shading=opts["shading"],
+            cull_backfaces=m["closed"] if opts["cull"] is None else opts["cull"])
+        image_io.write_png(out_path, framebuffer)
+    except Exception as e:
+        return out_path, time.perf_counter() - t0, f"{type(e).__name__}: {e}"
+    return out_path, time.perf_counter() - t0, None
+
+def _expand_list_files(paths):
+    """Aceita '@arquivo' com um caminho por linha (comentários '#' ignorados)."""
+    out = []
+    for p in paths:
+        if p.startswith("@"):
+            with open(p[1:], "r", encoding="utf-8") as f:
+                out.extend(line.strip() for line in f if line.strip() and not line.strip().startswith("#"))
+        else:
+            out.append(p)
+    return out
+
+def _dedupe(paths):
+    """Remove caminhos repetidos (mesmo arquivo), mantendo a ordem."""
+    seen = set()
+    out = []
+    for p in paths:
+        key = os.path.normcase(os.path.abspath(p))
+        if key not in seen:
+            seen.add(key)
+            out.append(p)
+    return out
+
+def unique_names(paths):
+    """
+    Nome curto de cada arquivo para os PNGs: o nome sem extensão; quando o mesmo nome
+    aparece em pastas diferentes, as pastas-pai entram no nome até ele ficar único
+    (ex.: a/maca.byu e b/maca.byu -> a_maca, b_maca).
+    """
+    comps = []
+    for p in paths:
+        c = os.path.normpath(os.path.abspath(p)).split(os.sep)
+        comps.append([x for x in c[:-1] if x] + [os.path.splitext(c[-1])[0]])
+    depth = [1] * len(paths)
+    while True:
+        names = ["_".join(c[-d:]) for c, d in zip(comps, depth)]
+        counts = {}
+        for n in names:
+            counts[n] = counts.get(n, 0) + 1
+        clash = [i for i, n in enumerate(names) if counts[n] > 1 and depth[i] < len(comps[i])]
+        if not clash:
+            return names
+        for i in clash:
+            depth[i] += 1
+
+def build_jobs(mesh_paths, camera_paths, out_dir, width, height, opts):
+    """
+    Lista de trabalhos em ordem malha-major (câmeras de uma malha ficam contíguas).
+    Levanta ValueError se dois trabalhos fossem gravar o mesmo PNG.
+    """
+    for cp in camera_paths:
+        if not os.path.isfile(cp):
+            print(f"Aviso: câmera '{cp}' não encontrada, ignorando.")
+    camera_paths = _dedupe(cp for cp in camera_paths if os.path.isfile(cp))
+    cams = [(name, camera.load_camera(cp)) for name, cp in zip(unique_names(camera_paths), camera_paths)]
+    mesh_paths = _dedupe(mesh_paths)
+    jobs = []
+    owner = {}  # png -> (malha, câmera) que o grava
+    for mesh_name, mp in zip(unique_names(mesh_paths), mesh_paths):
+        for cam_name, cam in cams:
+            out_path = os.path.join(out_dir, f"{mesh_name}__{cam_name}.png")
+            if out_path in owner:
+                other_mesh, other_cam = owner[out_path]
+                raise ValueError(f"'{mp}' x '{cam_name}' e '{other_mesh}' x '{other_cam}' "
+                                 f"gravariam o mesmo arquivo {out_path}")
+            owner[out_path] = (mp, cam_name)
+            jobs.append((mp, cam_name, cam, out_path, width, height, opts))
+    return jobs, len(cams)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Renderização em lote sem janela (malhas .byu x câmeras).")
+    ap.add_argument("--meshes", nargs="+", required=True, help="arquivos .byu (ou @lista.txt)")
+    ap.add_argument("--cameras", nargs="+", required=True, help="arquivos de câmera (ou @lista.txt)")
+    ap.add_argument("--out", default="renders", help="pasta de saída dos PNGs")
+    ap.add_argument("--width", type=int, default=800)
+    ap.add_argument("--height", type=int, default=600)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--zbuffer", action="store_true", help="renderizar com z-buffer")
+    ap.add_argument("--shading", choices=pipeline.SHADING_MODES, default="none",
+                    help="sombreamento com luz direcional (flat por face, Gouraud por vértice)")
+    cull = ap.add_mutually_exclusive_group()
+    cull.add_argument("--cull", dest="cull", action="store_true", default=None, help="forçar back-face culling")
+    cull.add_argument("--no-cull", dest="cull", action="store_false", help="desligar back-face culling")
+    args = ap.parse_args(argv)
+
+    mesh_paths = _expand_list_files(args.meshes)
+    missing = [p for p in mesh_paths if not os.path.isfile(p)]
+    for p in missing:
+        print(f"Aviso: malha '{p}' não encontrada, ignorando.")
+    mesh_paths = [p for p in mesh_paths if os.path.isfile(p)]
+    os.makedirs(args.out, exist_ok=True)
+
+    opts = {"zbuffer": args.zbuffer, "cull": args.cull, "shading": args.shading}
+    try:
+        jobs, n_cams = build_jobs(mesh_paths, _expand_list_files(args.cameras), args.out,
+                                  args.width, args.height, opts)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+    if not jobs:
+        print("Nada para renderizar.")
+        return 1
+
+    print(f"Renderizando {len(jobs)} imagens ({len(jobs) // n_cams} malhas x {n_cams} câmeras) "
+          f"com {args.workers} worker(s)...")
+    t0 = time.perf_counter()
+    failures = 0
+    if args.workers <= 1:
+        results = map(render_job, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.get_context().Pool(args.workers)
+        # chunk = câmeras de uma malha: o mesmo worker reaproveita a malha carregada
+        results = pool.imap_unordered(render_job, jobs, chunksize=max(1, n_cams))
+    try:
+        for i, (out_path, dt, err) in enumerate(results, 1):
+            if err:
+                failures += 1
+                print(f"[{i}/{len(jobs)}] ERRO {out_path}: {err}")
+            elif i % 50 == 0 or i == len(jobs):
+                print(f"[{i}/{len(jobs)}] {out_path} ({dt*1000:.0f} ms)")
+    finally:
+        if pool is not None:
+            pool.close(); pool.join()
+    total = time.perf_counter() - t0
+    print(f"Concluído: {len(jobs) - failures} imagens em {total:.2f}s "
+          f"({len(jobs) / total:.1f} imagens/s), {failures} falha(s).")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
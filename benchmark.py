@@ -0,0 +1,276 @@
+# benchmark.py
+# Benchmark por estágio do pipeline sobre as malhas de formas/ e malhas sintéticas maiores,
+# em várias resoluções e poses de câmera. Reporta mediana/percentis de tempo e pico de
+# alocação (tracemalloc), e grava JSON para comparar execuções (regressões).
+#
+# Uso:
+#   python benchmark.py                          # roda tudo, grava bench_results.json
+#   python benchmark.py --quick                  # menos repetições/resoluções
+#   python benchmark.py --compare antigo.json    # compara com execução anterior
+import argparse
+import glob
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import byu_loader
+import camera
+import display
+import main as viewer
+import mesh_cache
+import pipeline
+import projection
+import rasterizer
+import transform
+
+RESOLUTIONS = [(320, 240), (800, 600), (1920, 1080)]
+# poses em torno do centróide: (azimute, elevação) em graus e fator de distância (x raio)
+POSES = [(0.0, 20.0, 2.5), (120.0, -30.0, 2.0), (240.0, 60.0, 4.0)]
+SYNTHETIC_TRIS = [20000, 200000]
+REGRESSION_THRESHOLD = 0.10  # 10% mais lento que a base = regressão
+
+# ------------------------------------------------------------------ malhas
+
+def write_sphere_byu(path: str, n_triangles: int):
+    """Esfera UV com aproximadamente n_triangles triângulos, gravada em .byu."""
+    rings = max(3, int(math.sqrt(n_triangles / 4.0)))
+    segs = max(3, n_triangles // (2 * rings))
+    th = np.linspace(0.0, math.pi, rings + 1)
+    ph = np.linspace(0.0, 2.0 * math.pi, segs, endpoint=False)
+    T, P = np.meshgrid(th, ph, indexing="ij")
+    r = 100.0
+    verts = np.stack((r * np.sin(T) * np.cos(P), r * np.cos(T), r * np.sin(T) * np.sin(P)), axis=-1).reshape(-1, 3)
+    i = np.arange(rings)[:, None]; j = np.arange(segs)[None, :]
+    a = i * segs + j; b = i * segs + (j + 1) % segs
+    c = (i + 1) * segs + j; d = (i + 1) * segs + (j + 1) % segs
+    tris = np.concatenate((np.stack((a, c, b), -1).reshape(-1, 3), np.stack((b, c, d), -1).reshape(-1, 3)))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{len(verts)} {len(tris)}\n")
+        np.savetxt(f, verts, fmt="%.6f")
+        np.savetxt(f, tris + 1, fmt="%d")
+
+def bench_meshes(folder: str, synthetic, tmpdir: str):
+    paths = sorted(glob.glob(os.path.join(folder, "*.byu")))
+    # subpasta: o cache binário (pasta irmã) também fica dentro do diretório temporário
+    synth_dir = os.path.join(tmpdir, "sinteticas")
+    os.makedirs(synth_dir, exist_ok=True)
+    for n in synthetic:
+        p = os.path.join(synth_dir, f"esfera_{n}.byu")
+        write_sphere_byu(p, n)
+        paths.append(p)
+    return paths
+
+def pose_camera(m, az_deg, el_deg, dist_factor, base_cam):
+    bmin = np.array(m["bounds_min"]); bmax = np.array(m["bounds_max"])
+    radius = max(float(np.linalg.norm(bmax - bmin)) * 0.5, 1e-6)
+    c0 = m["centroid"]
+    C = viewer.vec_add(c0, viewer.cartesian_from_spherical(radius * dist_factor,
+                                                           math.radians(az_deg), math.radians(el_deg)))
+    cam = dict(base_cam)
+    cam["C"] = C
+    cam["N"] = viewer.vec_sub(c0, C)
+    cam["V"] = (0.0, 1.0, 0.0)
+    cam["d"] = 1.0; cam["hx"] = 0.5; cam["hy"] = 0.5 * 3.0 / 4.0
+    return cam
+
+# ------------------------------------------------------------------ medição
+
+def measure(fn, repeat: int, warmup: int = 1):
+    """Executa fn 'repeat' vezes; retorna tempos (ms) e pico de alocação (KiB) de uma execução extra."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak / 1024.0
+
+def summarize(times):
+    arr = np.array(times)
+    return {
+        "median_ms": float(np.median(arr)),
+        "p90_ms": float(np.percentile(arr, 90)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "min_ms": float(arr.min()),
+        "runs": len(times),
+    }
+
+# ------------------------------------------------------------------ estágios
+
+def load_stages(path):
+    """Estágios que só dependem do arquivo."""
+    return {
+        "byu_loader.load_byu": lambda: byu_loader.load_byu(path),
+        "byu_loader.load_byu_arrays": lambda: byu_loader.load_byu_arrays(path),
+        "byu_loader.load_byu_stream": lambda: byu_loader.load_byu_stream(path),
+        "mesh_cache.load_mesh_cached": lambda: mesh_cache.load_mesh_cached(path),
+    }
+
+def frame_stages(m, cam, width, height, surface, legacy: bool):
+    """Estágios por frame; as entradas de cada um são pré-calculadas pelo estágio anterior."""
+    verts, tris = m["vertices"], m["triangles"]
+    basis = transform.compute_camera_basis(cam)
+    view = transform.world_to_view_array(verts, basis)
+    proj = projection.world_view_to_screen_arrays(view, cam, width, height)
+    framebuffer, frame_proj, frame_tris = pipeline.render_frame(m, cam, width, height)
+    pick = pipeline.pick_buffers(frame_tris, frame_proj, width, height)
+    stages = {
+        "transform.world_to_view_array": lambda: transform.world_to_view_array(verts, basis),
+        "projection.world_view_to_screen_arrays": lambda: projection.world_view_to_screen_arrays(view, cam, width, height),
+        "rasterizer.rasterize_mesh_coverage": lambda: rasterizer.rasterize_mesh_coverage(tris, proj, width, height),
+        "rasterizer.rasterize_mesh_depth": lambda: rasterizer.rasterize_mesh_depth(tris, proj, width, height),
+        "pipeline.render_frame": lambda: pipeline.render_frame(m, cam, width, height),
+        "pipeline.pick_buffers": lambda: pipeline.pick_buffers(frame_tris, frame_proj, width, height),
+        "pipeline.rasterize_frame(picking)": lambda: pipeline.rasterize_frame(frame_tris, frame_proj, width, height,
+                                                                              True, picking={}),
+        "pipeline.pick": lambda: pipeline.pick(*pick, cam, width // 2, height // 2),
+        "display.blit_framebuffer": lambda: display.blit_framebuffer(surface, framebuffer),
+    }
+    stages["main.draw_overlays"] = lambda: viewer.draw_overlays(framebuffer.copy(), m, frame_proj, True, True)
+    if legacy:
+        verts_list = [tuple(p) for p in np.asarray(verts).tolist()]
+        view_list = transform.world_to_view_vertices(verts_list, basis)
+        overlay = viewer.draw_overlays(np.zeros_like(framebuffer), m, frame_proj, True, False)
+        filled = set(zip(*np.nonzero(framebuffer.any(axis=2).T)))
+        outline_pixels = set(zip(*np.nonzero(overlay.any(axis=2).T)))
+        stages.update({
+            "transform.world_to_view_vertices": lambda: transform.world_to_view_vertices(verts_list, basis),
+            "projection.world_view_to_screen_list": lambda: projection.world_view_to_screen_list(view_list, cam, width, height),
+            "display.draw_pixels": lambda: display.draw_pixels(surface, filled | outline_pixels),
+        })
+    return stages
+
+# ------------------------------------------------------------------ execução
+
+def run(args):
+    base_cam = camera.load_camera(args.camera)
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = bench_meshes(args.folder, args.synthetic, tmpdir)
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            m = mesh_cache.load_mesh_cached(path, use_cache=False)
+            n_tris = len(m["triangles"])
+            legacy = n_tris <= args.max_legacy_tris
+            print(f"== {name}: {len(m['vertices'])} vértices, {n_tris} triângulos"
+                  + ("" if legacy else " (estágios legados pulados)"))
+            for stage, fn in load_stages(path).items():
+                if stage == "byu_loader.load_byu" and not legacy:
+                    continue
+                if _selected(stage, args.stages):
+                    results.append(_record(stage, name, n_tris, None, None, fn, args.repeat))
+            for (w, h) in args.resolutions:
+                surface = pygame.Surface((w, h))
+                for pi, pose in enumerate(args.poses):
+                    cam = pose_camera(m, *pose, base_cam)
+                    for stage, fn in frame_stages(m, cam, w, h, surface, legacy).items():
+                        if _selected(stage, args.stages):
+                            results.append(_record(stage, name, n_tris, f"{w}x{h}", pi, fn, args.repeat))
+    return results
+
+def _selected(stage, filters):
+    return not filters or any(f in stage for f in filters)
+
+def _record(stage, mesh_name, n_tris, resolution, pose, fn, repeat):
+    times, peak_kib = measure(fn, repeat)
+    rec = {"stage": stage, "mesh": mesh_name, "triangles": n_tris,
+           "resolution": resolution, "pose": pose, "peak_alloc_kib": round(peak_kib, 1)}
+    rec.update(summarize(times))
+    where = f"{mesh_name}" + (f" {resolution} pose{pose}" if resolution else "")
+    print(f"  {stage:42s} {where:32s} med {rec['median_ms']:9.2f} ms  p90 {rec['p90_ms']:9.2f}  "
+          f"alloc {rec['peak_alloc_kib']:10.1f} KiB")
+    return rec
+
+def result_key(rec):
+    return (rec["stage"], rec["mesh"], rec["resolution"], rec["pose"])
+
+def compare(current, baseline_path, threshold):
+    """Imprime a razão mediana atual/base por estágio; retorna o número de regressões."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {result_key(r): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n== Comparação com {baseline_path} (limite {threshold:.0%}) ==")
+    for rec in current:
+        old = base.get(result_key(rec))
+        if old is None or old["median_ms"] <= 0:
+            continue
+        ratio = rec["median_ms"] / old["median_ms"]
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  <-- REGRESSÃO"
+            regressions += 1
+        elif ratio < 1.0 - threshold:
+            flag = "  (mais rápido)"
+        if flag or ratio > 1.0 + threshold / 2:
+            print(f"  {rec['stage']:42s} {rec['mesh']:12s} {rec['resolution'] or '-':>10s} "
+                  f"{old['median_ms']:9.2f} -> {rec['median_ms']:9.2f} ms (x{ratio:.2f}){flag}")
+    print(f"{regressions} regressão(ões).")
+    return regressions
+
+def _parse_resolution(s):
+    w, h = s.lower().split("x")
+    return int(w), int(h)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark por estágio do pipeline.")
+    ap.add_argument("--folder", default="formas")
+    ap.add_argument("--camera", default="camera.txt", help="câmera base (d/hx/hy são ajustados por pose)")
+    ap.add_argument("--synthetic", type=int, nargs="*", default=SYNTHETIC_TRIS,
+                    help="tamanhos (triângulos) das esferas sintéticas")
+    ap.add_argument("--resolutions", type=_parse_resolution, nargs="+", default=RESOLUTIONS)
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--stages", nargs="*", default=[], help="filtrar estágios por substring")
+    ap.add_argument("--max-legacy-tris", type=int, default=50000,
+                    help="acima disso, pular estágios legados (por pixel em Python)")
+    ap.add_argument("--quick", action="store_true", help="3 repetições, 1 resolução, 1 pose")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    ap.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = ap.parse_args(argv)
+    args.poses = POSES
+    if args.quick:
+        args.repeat = 3
+        args.resolutions = [(800, 600)]
+        args.poses = POSES[:1]
+
+    t0 = time.perf_counter()
+    results = run(args)
+    doc = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "duration_s": round(time.perf_counter() - t0, 2),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=1)
+    print(f"\nResultados gravados em {args.out} ({len(results)} medições).")
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# bvh.py
+# Hierarquia de volumes envolventes (BVH) sobre grupos de triângulos, usada para
+# descartar regiões inteiras da malha fora do frustum antes de transformar/projetar.
+from typing import Dict, List
+import numpy as np
+
+BVH = Dict[str, np.ndarray]
+
+LEAF_SIZE = 64  # triângulos por folha
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Intercala 2 zeros entre os 10 bits menos significativos (código de Morton 3D)."""
+    v = v.astype(np.uint64) & np.uint64(0x3FF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x030000FF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x0300F00F)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x030C30C3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x09249249)
+    return v
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    lo = points.min(axis=0)
+    ext = points.max(axis=0) - lo
+    ext[ext <= 0.0] = 1.0
+    q = np.clip((points - lo) / ext * 1023.0, 0, 1023).astype(np.uint64)
+    return (_spread_bits(q[:, 0]) << np.uint64(2)) | (_spread_bits(q[:, 1]) << np.uint64(1)) | _spread_bits(q[:, 2])
+
+def build_bvh(vertices: np.ndarray, triangles: np.ndarray, leaf_size: int = LEAF_SIZE) -> BVH:
+    """
+    Constrói a BVH de forma vetorizada (LBVH): os triângulos são ordenados pelo código de
+    Morton do centróide, agrupados em folhas de 'leaf_size' consecutivos, e os níveis
+    superiores juntam pares de nós vizinhos até sobrar a raiz (nó 0).
+    Retorna dict de arrays por nó (K nós):
+      'bmin','bmax' : (K,3) caixa envolvente
+      'center'      : (K,3) centro da esfera envolvente
+      'radius'      : (K,)  raio da esfera envolvente
+      'left','right': (K,)  filhos (-1 nas folhas)
+      'start','count': (K,) faixa em 'order' com os triângulos do nó
+      'order'       : (M,)  permutação dos índices de triângulos
+    """
+    tris = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    verts = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    m = len(tris)
+    if m == 0 or len(verts) == 0:
+        empty3 = np.empty((0, 3)); empty = np.empty(0, dtype=np.int64)
+        return {"bmin": empty3, "bmax": empty3, "center": empty3, "radius": np.empty(0),
+                "left": empty, "right": empty, "start": empty, "count": empty, "order": empty}
+
+    # índices inválidos só entram no cálculo de bounds como o vértice mais próximo;
+    # o rasterizador descarta esses triângulos depois
+    corners = verts[np.clip(tris, 0, len(verts) - 1)]  # (M,3,3)
+    order = np.argsort(morton_codes(corners.mean(axis=1)), kind="stable")
+    tri_min = corners.min(axis=1)[order]
+    tri_max = corners.max(axis=1)[order]
+
+    # folhas: blocos consecutivos na ordem de Morton
+    start = np.arange(0, m, leaf_size, dtype=np.int64)
+    count = np.minimum(leaf_size, m - start)
+    levels = [{
+        "bmin": np.minimum.reduceat(tri_min, start, axis=0),
+        "bmax": np.maximum.reduceat(tri_max, start, axis=0),
+        "start": start, "count": count,
+        "left": np.full(len(start), -1, dtype=np.int64),
+        "right": np.full(len(start), -1, dtype=np.int64),
+    }]
+    # subir juntando pares vizinhos; nó ímpar no fim sobe sozinho
+    while len(levels[-1]["start"]) > 1:
+        lv = levels[-1]
+        k = len(lv["start"])
+        li = np.arange(0, k - 1, 2)
+        ri = li + 1
+        parent = {
+            "bmin": np.minimum(lv["bmin"][li], lv["bmin"][ri]),
+            "bmax": np.maximum(lv["bmax"][li], lv["bmax"][ri]),
+            "start": lv["start"][li],
+            "count": lv["count"][li] + lv["count"][ri],
+            "left": li, "right": ri,
+        }
+        if k % 2:
+            # nó ímpar no fim: ganha um pai com um único filho (right = -1)
+            last = k - 1
+            for key in ("bmin", "bmax", "start", "count"):
+                parent[key] = np.concatenate((parent[key], lv[key][last:]))
+            parent["left"] = np.append(li, last)
+            parent["right"] = np.append(ri, -1)
+        levels.append(parent)
+
+    # numerar: raiz primeiro (nível mais alto) -> filhos com deslocamento do nível de baixo
+    offsets = [0] * len(levels)
+    total = 0
+    for i in range(len(levels) - 1, -1, -1):
+        offsets[i] = total
+        total += len(levels[i]["start"])
+    left = []; right = []
+    for i in range(len(levels) - 1, -1, -1):
+        lv = levels[i]
+        child_off = offsets[i - 1] if i > 0 else 0
+        left.append(np.where(lv["left"] >= 0, lv["left"] + child_off, -1))
+        right.append(np.where(lv["right"] >= 0, lv["right"] + child_off, -1))
+    ordered = levels[::-1]
+    bmin_a = np.concatenate([lv["bmin"] for lv in ordered])
+    bmax_a = np.concatenate([lv["bmax"] for lv in ordered])
+    center = (bmin_a + bmax_a) * 0.5
+    radius = np.linalg.norm(bmax_a - bmin_a, axis=1) * 0.5
+    return {
+        "bmin": bmin_a, "bmax": bmax_a, "center": center, "radius": radius,
+        "left": np.concatenate(left), "right": np.concatenate(right),
+        "start": np.concatenate([lv["start"] for lv in ordered]),
+        "count": np.concatenate([lv["count"] for lv in ordered]),
+        "order": order.astype(np.int64),
+    }
+
+def frustum_planes(camera_params: Dict[str, float]) -> np.ndarray:
+    """
+    Planos laterais + plano próximo do frustum em coordenadas de vista, como linhas (a,b,c)
+    com normal unitária apontando para FORA (ponto p está fora se a·p > 0).
+    Vem da condição de visibilidade da projeção: |d*X/Z| <= hx, |d*Y/Z| <= hy, Z > 0.
+    """
+    d = float(camera_params.get("d", 1.0))
+    kx = float(camera_params.get("hx", 1.0)) / d
+    ky = float(camera_params.get("hy", 1.0)) / d
+    planes = np.array([
+        [1.0, 0.0, -kx],
+        [-1.0, 0.0, -kx],
+        [0.0, 1.0, -ky],
+        [0.0, -1.0, -ky],
+        [0.0, 0.0, -1.0],
+    ])
+    return planes / np.linalg.norm(planes, axis=1, keepdims=True)
+
+def frustum_cull(bvh: BVH, basis: Dict[str, object], camera_params: Dict[str, float]) -> np.ndarray:
+    """
+    Percorre a BVH nível a nível (testes vetorizados por nível) e retorna os índices
+    (ordenados) dos triângulos cujos grupos intersectam o frustum.
+    Grupos totalmente dentro são aceitos sem descer na árvore; totalmente fora são descartados.
+    O teste usa as esferas envolventes (conservador).
+    """
+    n_nodes = len(bvh["start"])
+    if n_nodes == 0:
+        return np.empty(0, dtype=np.int64)
+    d = float(camera_params.get("d", 1.0))
+    if d <= 0.0 or float(camera_params.get("hx", 1.0)) <= 0.0 or float(camera_params.get("hy", 1.0)) <= 0.0:
+        # frustum degenerado: não arriscar descartar nada
+        return np.sort(bvh["order"])
+
+    M = basis["M"]
+    centers = bvh["center"] @ M[:3, :3].T + M[:3, 3]
+    planes = frustum_planes(camera_params)
+    radius = bvh["radius"]
+
+    accepted = []
+    frontier = np.zeros(1, dtype=np.int64)
+    while frontier.size:
+        dist = centers[frontier] @ planes.T            # (F,5) distância assinada aos planos
+        r = radius[frontier][:, None]
+        outside = (dist > r).any(axis=1)
+        inside = (dist < -r).all(axis=1)
+        is_leaf = bvh["left"][frontier] < 0
+        take = ~outside & (inside | is_leaf)
+        accepted.append(frontier[take])
+        descend = frontier[~outside & ~take]
+        frontier = np.concatenate((bvh["left"][descend], bvh["right"][descend]))
+        frontier = frontier[frontier >= 0]
+
+    nodes = np.concatenate(accepted)
+    if nodes.size == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = bvh["start"][nodes]; counts = bvh["count"][nodes]
+    # concatenar as faixas order[start:start+count] de todos os nós aceitos
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    tri_ids = bvh["order"][np.arange(counts.sum()) + offsets]
+    return np.sort(tri_ids)
@@ -1,6 +1,9 @@
 # byu_loader.py
 from typing import List, Tuple
 import os
+import warnings
+
+import numpy as np
 
 def parse_floats_from_tokens(tokens):
     return [float(t) for t in tokens]
@@ -8,7 +11,7 @@ def parse_floats_from_tokens(tokens):
 def parse_ints_from_tokens(tokens):
     return [int(t) for t in tokens]
 
-def load_byu(path: str) -> Tuple[List[Tuple[float,float,float]], List[Tuple[int,int,int]]]:
+def load_byu(path: str, as_arrays: bool = False):
     """
     Lê um arquivo .byu simples:
       primeira linha: <n_vertices> <n_triangles>
@@ -17,7 +20,10 @@ def load_byu(path: str) -> Tuple[List[Tuple[float,float,float]], List[Tuple[int,
     Retorna (vertices, triangles) onde:
       vertices: list de (x,y,z) floats
       triangles: list de (i0, i1, i2) int (0-based)
+    Com as_arrays=True delega para load_byu_arrays (arrays NumPy contíguos).
     """
+    if as_arrays:
+        return load_byu_arrays(path)
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Arquivo não encontrado: {path}")
 
@@ -74,6 +80,266 @@ def load_byu(path: str) -> Tuple[List[Tuple[float,float,float]], List[Tuple[int,
 
     return vertices, triangles
 
+def _read_byu_text(path: str) -> str:
+    """Lê o arquivo inteiro como texto, descartando linhas de comentário ('#')."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return _strip_comments(f.read())
+
+def _parse_numbers(text: str) -> np.ndarray:
+    """Converte texto com números separados por espaço em float64 (parser C do NumPy)."""
+    if not text.strip():
+        return np.empty(0, dtype=np.float64)
+    with warnings.catch_warnings():
+        # token não numérico: o NumPy só emite DeprecationWarning e trunca; tratar como erro
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(text, dtype=np.float64, sep=' ')
+        except (ValueError, DeprecationWarning) as e:
+            raise ValueError("Formato inválido: token não numérico no arquivo.") from e
+
+def _check_integral(vals: np.ndarray):
+    """Índices de face lidos como float: rejeita tokens não inteiros (ex.: 1.7), como o int() de load_byu."""
+    if np.any(vals != np.floor(vals)):
+        raise ValueError("Formato inválido: índice de face não inteiro.")
+
+def _check_range(idx: np.ndarray, n_vertices: int):
+    """Índices de face (1-based, já sem sinal) devem estar em 1..n_vertices."""
+    if idx.size and (idx.min() < 1 or idx.max() > n_vertices):
+        bad = idx[(idx < 1) | (idx > n_vertices)][0]
+        raise ValueError(f"Índice de face fora do intervalo 1..{n_vertices}: {int(bad)}.")
+
+def load_byu_arrays(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mesma leitura de load_byu, mas convertendo direto para arrays NumPy:
+      vertices: float64 (N,3), C-contíguo
+      triangles: int32 (M,3), 0-based, C-contíguo
+    Mantém as checagens de cabeçalho e o tratamento de índice negativo (remove o sinal).
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+
+    text = _read_byu_text(path)
+    parts = text.split(None, 2)
+    if len(parts) < 2:
+        raise ValueError("Formato inválido: menos de 2 tokens no arquivo (esperado 'n m' na primeira linha).")
+
+    try:
+        n_vertices = int(parts[0])
+        n_triangles = int(parts[1])
+    except Exception as e:
+        raise ValueError("Cabeçalho inválido. Esperado: <n_vertices> <n_triangles>") from e
+
+    nums = _parse_numbers(parts[2] if len(parts) > 2 else "")
+
+    n_vert_vals = 3 * n_vertices
+    if nums.size < n_vert_vals:
+        raise ValueError(f"Arquivo incompleto ao ler vértice {nums.size // 3 + 1}.")
+    vertices = np.ascontiguousarray(nums[:n_vert_vals].reshape(n_vertices, 3))
+
+    face_vals = nums[n_vert_vals:]
+    if face_vals.size < 3 * n_triangles:
+        raise ValueError(f"Arquivo incompleto ao ler triângulo {face_vals.size // 3 + 1}.")
+    _check_integral(face_vals[:3 * n_triangles])
+    # índice negativo (fim de face em BYU) -> remover sinal; converter para 0-based
+    idx = np.abs(face_vals[:3 * n_triangles])
+    _check_range(idx, n_vertices)
+    triangles = idx.astype(np.int32).reshape(n_triangles, 3)
+    triangles -= 1
+
+    return vertices, triangles
+
+STREAM_CHUNK_CHARS = 1 << 20  # ~1 MiB de texto por leitura
+
+def _read_header_stream(f) -> Tuple[int, int, str]:
+    """
+    Lê linhas até obter os 2 tokens do cabeçalho.
+    Retorna (n_vertices, n_triangles, resto_da_linha) — o resto volta para o fluxo de números.
+    """
+    tokens: List[str] = []
+    while len(tokens) < 2:
+        raw = f.readline()
+        if not raw:
+            break
+        line = raw.strip()
+        if not line or line.startswith('#'):
+            continue
+        tokens.extend(line.split())
+    if len(tokens) < 2:
+        raise ValueError("Formato inválido: menos de 2 tokens no arquivo (esperado 'n m' na primeira linha).")
+    try:
+        n_vertices = int(tokens[0])
+        n_triangles = int(tokens[1])
+    except Exception as e:
+        raise ValueError("Cabeçalho inválido. Esperado: <n_vertices> <n_triangles>") from e
+    return n_vertices, n_triangles, " ".join(tokens[2:])
+
+def _iter_number_chunks(f, first: str, chunk_chars: int):
+    """Gera arrays float64 com os números do arquivo, um bloco de linhas completas por vez."""
+    carry = first + "\n"
+    while True:
+        data = f.read(chunk_chars)
+        if not data:
+            if carry.strip():
+                yield _parse_numbers(_strip_comments(carry))
+            return
+        text = carry + data
+        cut = text.rfind("\n")
+        if cut < 0:
+            # linha maior que o bloco: continuar acumulando
+            carry = text
+            continue
+        carry = text[cut + 1:]
+        nums = _parse_numbers(_strip_comments(text[:cut]))
+        if nums.size:
+            yield nums
+
+def _strip_comments(text: str) -> str:
+    if '#' not in text:
+        return text
+    return "\n".join(line for line in text.splitlines() if not line.strip().startswith('#'))
+
+def _fan_triangulate(vals: np.ndarray, max_faces: int):
+    """
+    Faces poligonais terminadas por índice negativo (v0 v1 ... -vk).
+    Cada face com k vértices vira k-2 triângulos em leque (v0, vi, vi+1).
+    Retorna (triângulos 0-based (T,3), n_faces_consumidas, sobra_sem_terminador).
+    """
+    ends = np.flatnonzero(vals < 0)
+    if ends.size == 0 or max_faces <= 0:
+        return np.empty((0, 3), dtype=np.int32), 0, vals
+    ends = ends[:max_faces]
+    used = int(ends[-1]) + 1
+    idx = np.abs(vals[:used]) - 1
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    face_of = np.repeat(np.arange(ends.size), lengths)
+    pos_in_face = np.arange(used) - starts[face_of]
+    p = np.flatnonzero(pos_in_face >= 2)   # faces com < 3 vértices não geram triângulos
+    tris = np.empty((p.size, 3), dtype=np.int32)
+    tris[:, 0] = idx[starts[face_of[p]]]
+    tris[:, 1] = idx[p - 1]
+    tris[:, 2] = idx[p]
+    return tris, int(ends.size), vals[used:]
+
+POLYGON_LOOKAHEAD = 3 * 1024  # índices de face examinados para decidir entre polígonos e triplas
+
+def _polygon_mode(vals: np.ndarray, at_end: bool):
+    """
+    Faces poligonais (terminadas por negativo) se há negativo entre os primeiros
+    POLYGON_LOOKAHEAD índices de face; triplas se não há e a janela já está completa (ou o
+    arquivo acabou); None = ainda indeciso. Só depende dos dados, não do tamanho dos blocos.
+    """
+    if (vals[:POLYGON_LOOKAHEAD] < 0).any():
+        return True
+    if vals.size >= POLYGON_LOOKAHEAD or at_end:
+        return False
+    return None
+
+def load_byu_stream(path: str, chunk_chars: int = STREAM_CHUNK_CHARS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parser em fluxo para malhas muito grandes: lê o arquivo em blocos e preenche
+    buffers pré-alocados (vértices (N,3) float64 e triângulos int32), sem manter
+    todos os tokens em memória. O pico de memória fica perto do tamanho da malha final
+    (mais um bloco de texto).
+    Faces:
+      - se os primeiros índices de face (POLYGON_LOOKAHEAD) contêm negativos, as faces são polígonos
+        terminados por índice negativo e são trianguladas em leque durante a leitura
+        (m do cabeçalho = número de faces);
+      - caso contrário, triplas de índices como em load_byu (m = número de triângulos).
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+
+    with open(path, 'r', encoding='utf-8') as f:
+        n_vertices, n_faces, rest = _read_header_stream(f)
+
+        vertices = np.empty((n_vertices, 3), dtype=np.float64)
+        vflat = vertices.reshape(-1)
+        triangles = np.empty((n_faces, 3), dtype=np.int32)
+        n_vert_vals = 3 * n_vertices
+        v_filled = 0
+        t_filled = 0
+        faces_done = 0
+        polygon_mode = None  # decidido pelos primeiros POLYGON_LOOKAHEAD índices de face
+        pending = np.empty(0, dtype=np.int64)
+
+        def consume(vals: np.ndarray, at_end: bool) -> np.ndarray:
+            """Converte os índices de 'vals' em triângulos; retorna a sobra (face incompleta)."""
+            nonlocal triangles, t_filled, faces_done
+            if polygon_mode:
+                if at_end and faces_done < n_faces and vals.size:
+                    # última face sem terminador negativo: aceitar como polígono fechado
+                    vals = vals.copy()
+                    vals[-1] = -abs(vals[-1])
+                new_tris, consumed, rest = _fan_triangulate(vals, n_faces - faces_done)
+                faces_done += consumed
+            else:
+                k = min(vals.size // 3, n_faces - faces_done)
+                new_tris = (np.abs(vals[:3 * k]) - 1).astype(np.int32).reshape(k, 3)
+                rest = vals[3 * k:]
+                faces_done += k
+            _check_range(new_tris + 1, n_vertices)
+            if t_filled + len(new_tris) > len(triangles):
+                # leque gerou mais triângulos que faces: crescer o buffer (1.5x)
+                grown = np.empty((max(t_filled + len(new_tris), len(triangles) * 3 // 2), 3), dtype=np.int32)
+                grown[:t_filled] = triangles[:t_filled]
+                triangles = grown
+            triangles[t_filled:t_filled + len(new_tris)] = new_tris
+            t_filled += len(new_tris)
+            return rest
+
+        for nums in _iter_number_chunks(f, rest, chunk_chars):
+            if v_filled < n_vert_vals:
+                k = min(n_vert_vals - v_filled, nums.size)
+                vflat[v_filled:v_filled + k] = nums[:k]
+                v_filled += k
+                nums = nums[k:]
+                if nums.size == 0:
+                    continue
+            if faces_done >= n_faces:
+                break
+
+            _check_integral(nums)
+            vals = nums.astype(np.int64)
+            if pending.size:
+                vals = np.concatenate((pending, vals))
+            if polygon_mode is None:
+                polygon_mode = _polygon_mode(vals, at_end=False)
+                if polygon_mode is None:
+                    pending = vals  # ainda indeciso: acumula até decidir
+                    continue
+            pending = consume(vals, at_end=False)
+
+    if v_filled < n_vert_vals:
+        raise ValueError(f"Arquivo incompleto ao ler vértice {v_filled // 3 + 1}.")
+    if faces_done < n_faces and pending.size:
+        if polygon_mode is None:
+            polygon_mode = _polygon_mode(pending, at_end=True)
+        consume(pending, at_end=True)
+    if faces_done < n_faces:
+        raise ValueError(f"Arquivo incompleto ao ler triângulo {faces_done + 1}.")
+
+    if t_filled != len(triangles):
+        triangles = triangles[:t_filled].copy()
+    return vertices, triangles
+
+def check_stream_chunks(path: str, chunk_sizes=None) -> int:
+    """
+    Confere que load_byu_stream dá exatamente o mesmo resultado com vários tamanhos de
+    bloco (pequenos o bastante para cortar números, linhas e faces ao meio) que com o
+    bloco padrão. Levanta ValueError na primeira divergência; retorna quantos tamanhos testou.
+    """
+    if chunk_sizes is None:
+        chunk_sizes = list(range(1, 65)) + [2 ** k for k in range(7, 21)]
+    ref_v, ref_t = load_byu_stream(path)
+    for c in chunk_sizes:
+        v, t = load_byu_stream(path, chunk_chars=c)
+        if not (np.array_equal(v, ref_v) and np.array_equal(t, ref_t)):
+            raise ValueError(f"{path}: resultado de load_byu_stream muda com blocos de {c} caracteres")
+    return len(chunk_sizes)
+
 # função de teste simples (pode ser chamada diretamente)
 def quick_test_load(filename: str):
     try:
@@ -93,6 +359,9 @@ def quick_test_load(filename: str):
 if __name__ == "__main__":
     import sys
     if len(sys.argv) < 2:
-        print("Uso: python byu_loader.py arquivo.byu")
+        print("Uso: python byu_loader.py arquivo.byu | --check-chunks arquivo.byu [...]")
+    elif sys.argv[1] == "--check-chunks":
+        for p in sys.argv[2:]:
+            print(f"{p}: {check_stream_chunks(p)} tamanhos de bloco, resultado idêntico")
     else:
         quick_test_load(sys.argv[1])
\ No newline at end of file
@@ -1,5 +1,6 @@
 # display.py (atualizado: inclui render_help e mantém funções anteriores)
 import pygame
+import numpy as np
 from typing import Set, Tuple, List
 
 Pixel = Tuple[int,int]
@@ -28,17 +29,91 @@ def draw_pixels(surface: pygame.Surface, pixels: Set[Pixel], color: Color = (255
     finally:
         surface.unlock()
 
+def mask_from_pixels(pixels, width: int, height: int) -> np.ndarray:
+    """Converte um conjunto de pixels (x,y) em máscara (height x width) — ponte para código baseado em sets."""
+    mask = np.zeros((height, width), dtype=bool)
+    if pixels:
+        xy = np.array(list(pixels), dtype=np.int64).reshape(-1, 2)
+        ok = (xy[:, 0] >= 0) & (xy[:, 0] < width) & (xy[:, 1] >= 0) & (xy[:, 1] < height)
+        mask[xy[ok, 1], xy[ok, 0]] = True
+    return mask
+
+def compose_layers(base: np.ndarray, layers: List[Tuple[np.ndarray, Color]]) -> np.ndarray:
+    """
+    Compõe camadas de sobreposição no próprio array (height x width x 3, uint8):
+    cada camada é (máscara height x width, cor), aplicada em ordem (a última fica por cima).
+    """
+    for mask, color in layers:
+        if mask is not None:
+            base[mask != 0] = color
+    return base
+
+def indexed_to_rgb(index_layer: np.ndarray, palette) -> np.ndarray:
+    """Camada indexada por cor (height x width, inteiros) -> RGB via tabela 'palette' (K x 3)."""
+    return np.asarray(palette, dtype=np.uint8)[index_layer]
+
+def blit_framebuffer(surface: pygame.Surface, framebuffer: np.ndarray, top_left: Tuple[int,int] = (0,0)):
+    """
+    Envia um framebuffer inteiro para a superfície numa única cópia em bloco.
+    framebuffer: (height, width, 3) uint8 RGB, ou (height, width) indexado/escala de cinza.
+    Se o tamanho bater com a superfície usa pixelcopy direto; senão faz blit de uma superfície temporária.
+    """
+    if framebuffer.ndim == 2:
+        framebuffer = np.repeat(framebuffer[:, :, None], 3, axis=2)
+    h, w = framebuffer.shape[:2]
+    if top_left == (0, 0) and surface.get_size() == (w, h):
+        pygame.pixelcopy.array_to_surface(surface, framebuffer.swapaxes(0, 1))
+    else:
+        surface.blit(pygame.surfarray.make_surface(framebuffer.swapaxes(0, 1)), top_left)
+
+def upscale_nearest(framebuffer: np.ndarray, factor: int, width: int = None, height: int = None) -> np.ndarray:
+    """
+    Amplia o framebuffer (height x width[, 3]) por vizinho mais próximo: cada pixel vira um bloco
+    factor x factor. width/height recortam o resultado (quando a tela não é múltipla de factor).
+    """
+    if factor == 1:
+        return framebuffer
+    out = np.repeat(np.repeat(framebuffer, factor, axis=0), factor, axis=1)
+    return out[:height, :width]
+
 def present():
     pygame.display.flip()
 
 def quit_pygame():
+    clear_caches()
     pygame.quit()
 
 # ----------------- Texto, lista e panel de ajuda -----------------
 
+# SysFont faz busca nas fontes do sistema a cada chamada: as fontes ficam em cache por (nome, tamanho)
+_FONT_CACHE = {}
+# painéis pré-renderizados: tipo -> (chave do conteúdo, superfície, posição, retângulos)
+_PANEL_CACHE = {}
+
+def get_font(font_name: str = None, font_size: int = 18) -> pygame.font.Font:
+    key = (font_name, font_size)
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        font = pygame.font.SysFont(font_name, font_size)
+        _FONT_CACHE[key] = font
+    return font
+
+def clear_caches():
+    """Descarta fontes e painéis em cache (obrigatório após pygame.quit)."""
+    _FONT_CACHE.clear()
+    _PANEL_CACHE.clear()
+
+def _cached_panel(kind: str, key, build):
+    """Devolve (superfície, posição, retângulos) do painel 'kind', reconstruindo só se 'key' mudou."""
+    entry = _PANEL_CACHE.get(kind)
+    if entry is None or entry[0] != key:
+        entry = (key, *build())
+        _PANEL_CACHE[kind] = entry
+    return entry[1:]
+
 def draw_text(surface: pygame.Surface, text: str, pos: Tuple[int,int],
               color: Color = (255,255,255), font_name: str = None, font_size: int = 18) -> pygame.Rect:
-    font = pygame.font.SysFont(font_name, font_size)
+    font = get_font(font_name, font_size)
     surf = font.render(text, True, color)
     rect = surf.get_rect(topleft=pos)
     surface.blit(surf, rect)
@@ -54,28 +129,41 @@ def render_object_list_with_highlight(surface: pygame.Surface, items: List[str],
                        selected_color: Color = (255,200,0),
                        padding: int = 4,
                        selected_index: int = None) -> List[Tuple[int, pygame.Rect, str]]:
-    x0, y0 = top_left
-    font = pygame.font.SysFont(font_name, font_size)
-    line_height = font.get_linesize() + padding
-    total_h = line_height * len(items) + padding
-    total_w = width
-    bg_rect = pygame.Rect(x0-2, y0-2, total_w+4, total_h+4)
-    s = pygame.Surface((bg_rect.w, bg_rect.h), flags=pygame.SRCALPHA)
-    s.fill((*bg_color, 220))
-    surface.blit(s, (bg_rect.x, bg_rect.y))
-
-    rects = []
-    for i, item in enumerate(items):
-        iy = y0 + i * line_height
-        if selected_index is not None and i == selected_index:
-            item_bg = pygame.Rect(x0 + padding//2, iy + padding//2, total_w - padding, line_height - padding)
-            pygame.draw.rect(surface, (40,40,80), item_bg)
-        color = selected_color if (selected_index is not None and i == selected_index) else item_color
-        txt_surf = font.render(item, True, color)
-        txt_rect = txt_surf.get_rect(topleft=(x0 + padding, iy + padding//2))
-        surface.blit(txt_surf, txt_rect)
-        rects.append((i, txt_rect, item))
-    return rects
+    """
+    Lista de objetos com o item selecionado em destaque. O painel é renderizado numa
+    superfície em cache e só é refeito quando a lista, a seleção ou o estilo mudam.
+    Retorna [(índice, retângulo na tela, nome)] para teste de clique.
+    """
+    key = (tuple(items), tuple(top_left), width, font_name, font_size, bg_color,
+           item_color, selected_color, padding, selected_index)
+
+    def build():
+        x0, y0 = top_left
+        font = get_font(font_name, font_size)
+        line_height = font.get_linesize() + padding
+        total_h = line_height * len(items) + padding
+        total_w = width
+        bg_rect = pygame.Rect(x0-2, y0-2, total_w+4, total_h+4)
+        s = pygame.Surface((bg_rect.w, bg_rect.h), flags=pygame.SRCALPHA)
+        s.fill((*bg_color, 220))
+        # coordenadas locais do painel = tela - (bg_rect.x, bg_rect.y)
+        ox, oy = x0 - bg_rect.x, y0 - bg_rect.y
+
+        rects = []
+        for i, item in enumerate(items):
+            iy = i * line_height
+            if selected_index is not None and i == selected_index:
+                item_bg = pygame.Rect(ox + padding//2, oy + iy + padding//2, total_w - padding, line_height - padding)
+                pygame.draw.rect(s, (40,40,80), item_bg)
+            color = selected_color if (selected_index is not None and i == selected_index) else item_color
+            txt_surf = font.render(item, True, color)
+            s.blit(txt_surf, (ox + padding, oy + iy + padding//2))
+            rects.append((i, txt_surf.get_rect(topleft=(x0 + padding, y0 + iy + padding//2)), item))
+        return s, bg_rect.topleft, rects
+
+    panel, pos, rects = _cached_panel("object_list", key, build)
+    surface.blit(panel, pos)
+    return list(rects)
 
 def render_help(surface: pygame.Surface, lines: List[str],
                 top_left: Tuple[int,int] = None,
@@ -87,29 +175,94 @@ def render_help(surface: pygame.Surface, lines: List[str],
     """
     Desenha uma caixa de ajuda com as linhas fornecidas.
     Se top_left for None, posiciona no canto inferior esquerdo.
+    A caixa fica em cache e só é refeita quando as linhas, o estilo ou o tamanho da tela mudam.
+    """
+    key = (tuple(lines), top_left, font_name, font_size, bg_color, text_color, padding, surface.get_size())
+
+    def build():
+        font = get_font(font_name, font_size)
+        line_height = font.get_linesize()
+        n = len(lines)
+        surf_h = n * (line_height + 2) + padding*2
+        surf_w = max(font.size(line)[0] for line in lines) + padding*2
+
+        screen_w, screen_h = surface.get_size()
+        if top_left is None:
+            x0 = 8
+            y0 = screen_h - surf_h - 8
+        else:
+            x0, y0 = top_left
+
+        bg_surf = pygame.Surface((surf_w, surf_h), flags=pygame.SRCALPHA)
+        # fundo semi-transparente
+        bg_surf.fill((*bg_color, 200))
+        # borda
+        pygame.draw.rect(bg_surf, (80,80,80), bg_surf.get_rect(), 1)
+
+        # desenhar linhas
+        for i, line in enumerate(lines):
+            ty = padding + i * (line_height + 2)
+            txt_surf = font.render(line, True, text_color)
+            bg_surf.blit(txt_surf, (padding, ty))
+        return bg_surf, (x0, y0), None
+
+    panel, pos, _ = _cached_panel("help", key, build)
+    surface.blit(panel, pos)
+
+def render_hud(surface: pygame.Surface, lines: List[str],
+               font_name: str = None,
+               font_size: int = 15,
+               bg_color: Tuple[int,int,int] = (0,0,0),
+               text_color: Tuple[int,int,int] = (120,255,120),
+               padding: int = 6,
+               margin: int = 8):
+    """
+    HUD de desempenho (perf.hud_lines) no canto superior direito.
     """
-    font = pygame.font.SysFont(font_name, font_size)
+    if not lines:
+        return
+    font = get_font(font_name or "monospace", font_size)
     line_height = font.get_linesize()
-    n = len(lines)
-    surf_h = n * (line_height + 2) + padding*2
-    surf_w = max(font.size(line)[0] for line in lines) + padding*2
-
-    screen_w, screen_h = surface.get_size()
-    if top_left is None:
-        x0 = 8
-        y0 = screen_h - surf_h - 8
-    else:
-        x0, y0 = top_left
 
-    bg_surf = pygame.Surface((surf_w, surf_h), flags=pygame.SRCALPHA)
-    # fundo semi-transparente
-    bg_surf.fill((*bg_color, 200))
-    # borda
-    pygame.draw.rect(bg_surf, (80,80,80), bg_surf.get_rect(), 1)
-    surface.blit(bg_surf, (x0, y0))
+    # os números mudam a cada frame: o texto é cacheado por linha (só as do frame anterior
+    # ficam guardadas) e o fundo pelo tamanho
+    style = (font_name, font_size, text_color)
+    prev = _PANEL_CACHE.get("hud_lines")
+    known = prev[1] if prev is not None and prev[0] == style else {}
+    rendered = {line: known.get(line) or font.render(line, True, text_color) for line in lines}
+    _PANEL_CACHE["hud_lines"] = (style, rendered)
+
+    surf_h = len(lines) * line_height + padding*2
+    surf_w = max(rendered[line].get_width() for line in lines) + padding*2
+    x0 = surface.get_width() - surf_w - margin
+    y0 = margin
 
-    # desenhar linhas
+    def build():
+        bg_surf = pygame.Surface((surf_w, surf_h), flags=pygame.SRCALPHA)
+        bg_surf.fill((*bg_color, 170))
+        return bg_surf, None, None
+
+    bg_surf, _, _ = _cached_panel("hud", (surf_w, surf_h, bg_color), build)
+    surface.blit(bg_surf, (x0, y0))
     for i, line in enumerate(lines):
-        ty = y0 + padding + i * (line_height + 2)
-        txt_surf = font.render(line, True, text_color)
-        surface.blit(txt_surf, (x0 + padding, ty))
+        surface.blit(rendered[line], (x0 + padding, y0 + padding + i * line_height))
+
+def render_status(surface: pygame.Surface, text: str,
+                  font_name: str = None,
+                  font_size: int = 18,
+                  bg_color: Tuple[int,int,int] = (40,40,80),
+                  text_color: Tuple[int,int,int] = (255,200,0),
+                  padding: int = 6,
+                  bottom: bool = False):
+    """
+    Indicador de estado centralizado no topo da tela (ex.: carga em andamento), ou no canto
+    inferior direito com bottom=True (ex.: triângulo selecionado), longe da ajuda e da lista.
+    """
+    font = get_font(font_name, font_size)
+    txt = font.render(text, True, text_color)
+    w, h = txt.get_width() + padding*2, txt.get_height() + padding*2
+    x0 = surface.get_width() - w - 8 if bottom else (surface.get_width() - w) // 2
+    bg = pygame.Surface((w, h), flags=pygame.SRCALPHA)
+    bg.fill((*bg_color, 220))
+    bg.blit(txt, (padding, padding))
+    surface.blit(bg, (x0, surface.get_height() - h - 8 if bottom else 8))
@@ -0,0 +1,26 @@
+# image_io.py
+# Escrita de imagens sem pygame/janela (modos headless): PNG via zlib e RGB cru.
+import struct
+import zlib
+
+import numpy as np
+
+def encode_png(rgb: np.ndarray, compress_level: int = 6) -> bytes:
+    """Codifica um framebuffer (height, width, 3) uint8 como PNG RGB 8 bits."""
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    height, width = rgb.shape[:2]
+    # cada linha recebe o byte de filtro 0 (None)
+    raw = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), compress_level)) + chunk(b"IEND", b""))
+
+def write_png(path: str, rgb: np.ndarray, compress_level: int = 6):
+    with open(path, "wb") as f:
+        f.write(encode_png(rgb, compress_level))
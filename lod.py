@@ -0,0 +1,245 @@
+# lod.py
+# Níveis de detalhe (LOD) por simplificação com métrica de erro quádrico (Garland-Heckbert).
+# O colapso de arestas é feito em passadas vetorizadas: a cada passada escolhe-se um
+# emparelhamento de arestas baratas (nenhum vértice em duas arestas escolhidas), rejeita-se
+# as que invertem faces vizinhas e colapsa-se todas de uma vez. As quádricas são acumuladas
+# entre passadas e entre níveis, então cada nível parte do anterior.
+# Usado pelo visualizador (main.py) enquanto a câmera se move.
+from typing import List, Optional, Tuple
+import math
+
+import numpy as np
+
+import mesh as mesh_mod
+import transform
+
+LOD_RATIO = 0.25            # cada nível tem ~1/4 dos triângulos do anterior
+LOD_MIN_TRIANGLES = 2000    # não gera níveis menores que isso
+LOD_MAX_LEVELS = 4
+BUILD_MIN_TRIANGLES = 20000 # malhas menores não ganham LOD (já são rápidas)
+BOUNDARY_WEIGHT = 1000.0    # peso dos planos que seguram as bordas de malhas abertas
+PIXELS_PER_TRIANGLE = 4.0   # abaixo disso mais triângulos não aparecem na tela
+FRAME_BUDGET_MS = 1000.0 / 30.0
+EDGE_CHUNK = 1 << 18        # arestas avaliadas por lote (limita a memória das quádricas por aresta)
+
+# quádrica simétrica 4x4 guardada pelos 10 coeficientes [aa ab ac ad bb bc bd cc cd dd]
+_TRIU = np.triu_indices(4)
+
+def _plane_quadrics(planes: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Planos (K,4) [a,b,c,d] -> quádricas (K,10) ponderadas."""
+    outer = planes[:, :, None] * planes[:, None, :]
+    return outer[:, _TRIU[0], _TRIU[1]] * weights[:, None]
+
+def _accumulate(q: np.ndarray, idx: np.ndarray, kq: np.ndarray):
+    for c in range(10):
+        q[:, c] += np.bincount(idx, weights=kq[:, c], minlength=len(q))
+
+def _vertex_quadrics(V: np.ndarray, T: np.ndarray) -> np.ndarray:
+    """Quádrica de cada vértice: soma dos planos das faces incidentes (peso = área) + planos de borda."""
+    p0, p1, p2 = V[T[:, 0]], V[T[:, 1]], V[T[:, 2]]
+    n = np.cross(p1 - p0, p2 - p0)
+    L = np.linalg.norm(n, axis=1)
+    nu = n / np.where(L > 0, L, 1.0)[:, None]
+    planes = np.concatenate((nu, -np.einsum("ij,ij->i", nu, p0)[:, None]), axis=1)
+    q = np.zeros((len(V), 10))
+    kq = _plane_quadrics(planes, 0.5 * L)
+    _accumulate(q, T.ravel(), np.repeat(kq, 3, axis=0))
+
+    # bordas (aresta em uma só face): plano perpendicular à face passando pela aresta
+    edges, tri_edges = mesh_mod.build_edge_index(T)
+    count = np.bincount(tri_edges.ravel(), minlength=len(edges))
+    flat = np.flatnonzero(count[tri_edges.ravel()] == 1)
+    if flat.size:
+        f, k = flat // 3, flat % 3
+        a = T[f, k]; b = T[f, (k + 1) % 3]
+        e = V[b] - V[a]
+        bn = np.cross(e, nu[f])
+        bl = np.linalg.norm(bn, axis=1)
+        bn = bn / np.where(bl > 0, bl, 1.0)[:, None]
+        bplanes = np.concatenate((bn, -np.einsum("ij,ij->i", bn, V[a])[:, None]), axis=1)
+        kb = _plane_quadrics(bplanes, BOUNDARY_WEIGHT * np.einsum("ij,ij->i", e, e))
+        _accumulate(q, np.concatenate((a, b)), np.concatenate((kb, kb)))
+    return q
+
+def _quadric_error(q: np.ndarray, p: np.ndarray) -> np.ndarray:
+    """vᵀQv com v = (x, y, z, 1) para cada linha."""
+    x, y, z = p[:, 0], p[:, 1], p[:, 2]
+    aa, ab, ac, ad, bb, bc, bd, cc, cd, dd = q.T
+    return (aa*x*x + 2*ab*x*y + 2*ac*x*z + 2*ad*x + bb*y*y + 2*bc*y*z + 2*bd*y
+            + cc*z*z + 2*cd*z + dd)
+
+def _edge_costs(V: np.ndarray, Q: np.ndarray, edges: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Custo e posição do colapso de cada aresta: melhor entre os dois extremos e o ponto médio."""
+    cost = np.empty(len(edges))
+    pos = np.empty((len(edges), 3))
+    for s in range(0, len(edges), EDGE_CHUNK):
+        a = edges[s:s + EDGE_CHUNK, 0]; b = edges[s:s + EDGE_CHUNK, 1]
+        qe = Q[a] + Q[b]
+        cands = (V[a], V[b], 0.5 * (V[a] + V[b]))
+        errs = np.stack([_quadric_error(qe, c) for c in cands])
+        best = errs.argmin(axis=0)
+        cost[s:s + EDGE_CHUNK] = errs[best, np.arange(len(a))]
+        pos[s:s + EDGE_CHUNK] = np.choose(best[:, None], cands)
+    return cost, pos
+
+def _flipped(V: np.ndarray, T: np.ndarray, moved: np.ndarray, newpos: np.ndarray,
+             owner: np.ndarray) -> np.ndarray:
+    """Índices (em owner) das arestas cujo colapso inverte alguma face que sobrevive."""
+    tri_owner = owner[T]
+    touched = np.flatnonzero((tri_owner >= 0).any(axis=1))
+    t = T[touched]; to = tri_owner[touched]
+    # faces com dois vértices da mesma aresta somem no colapso: não contam
+    collapsing = (((to[:, 0] == to[:, 1]) & (to[:, 0] >= 0)) | ((to[:, 1] == to[:, 2]) & (to[:, 1] >= 0))
+                  | ((to[:, 2] == to[:, 0]) & (to[:, 2] >= 0)))
+    t = t[~collapsing]; to = to[~collapsing]
+    P = V[t]
+    Pn = np.where(moved[t][:, :, None], newpos[np.maximum(to, 0)], P)
+    n_old = np.cross(P[:, 1] - P[:, 0], P[:, 2] - P[:, 0])
+    n_new = np.cross(Pn[:, 1] - Pn[:, 0], Pn[:, 2] - Pn[:, 0])
+    bad = np.einsum("ij,ij->i", n_old, n_new) <= 0.0
+    return np.unique(to[bad][to[bad] >= 0])
+
+def _cheap_matching(edges: np.ndarray, rank: np.ndarray, n_vertices: int, rounds: int = 4) -> np.ndarray:
+    """
+    Emparelhamento guloso aproximado: em cada rodada entram as arestas que são a mais barata
+    (menor rank) de seus dois vértices ainda livres; nenhum vértice fica em duas arestas.
+    """
+    taken = np.zeros(n_vertices, dtype=bool)
+    cand = np.arange(len(edges))
+    picked = []
+    for _ in range(rounds):
+        cand = cand[~(taken[edges[cand, 0]] | taken[edges[cand, 1]])]
+        if cand.size == 0:
+            break
+        best = np.full(n_vertices, len(edges), dtype=np.int64)
+        np.minimum.at(best, edges[cand, 0], rank[cand])
+        np.minimum.at(best, edges[cand, 1], rank[cand])
+        win = cand[(best[edges[cand, 0]] == rank[cand]) & (best[edges[cand, 1]] == rank[cand])]
+        taken[edges[win, 0]] = True
+        taken[edges[win, 1]] = True
+        picked.append(win)
+    return np.concatenate(picked) if picked else cand[:0]
+
+def _collapse_pass(V: np.ndarray, T: np.ndarray, Q: np.ndarray, max_collapses: int):
+    """Uma passada de colapsos em paralelo. Retorna (T novo, número de colapsos)."""
+    edges, _ = mesh_mod.build_edge_index(T)
+    if len(edges) == 0 or max_collapses <= 0:
+        return T, 0
+    cost, pos = _edge_costs(V, Q, edges)
+    order = np.argsort(cost, kind="stable")
+    rank = np.empty(len(edges), dtype=np.int64)
+    rank[order] = np.arange(len(edges))
+    sel = _cheap_matching(edges, rank, len(V))
+
+    # rejeita as arestas que invertem faces até não sobrar inversão (sel diminui a cada volta)
+    while sel.size:
+        a, b = edges[sel, 0], edges[sel, 1]
+        owner = np.full(len(V), -1, dtype=np.int64)
+        owner[a] = np.arange(len(sel)); owner[b] = np.arange(len(sel))
+        bad = _flipped(V, T, owner >= 0, pos[sel], owner)
+        if bad.size == 0:
+            break
+        sel = np.delete(sel, bad)
+    if sel.size == 0:
+        return T, 0
+    sel = sel[np.argsort(rank[sel])][:max_collapses]
+
+    a, b = edges[sel, 0], edges[sel, 1]
+    V[a] = pos[sel]
+    Q[a] += Q[b]
+    remap = np.arange(len(V))
+    remap[b] = a
+    T = remap[T]
+    keep = (T[:, 0] != T[:, 1]) & (T[:, 1] != T[:, 2]) & (T[:, 2] != T[:, 0])
+    return T[keep], len(sel)
+
+def _compact(V: np.ndarray, T: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    used, local = np.unique(T, return_inverse=True)
+    return V[used].copy(), local.reshape(-1, 3).astype(np.int32)
+
+def _valid_triangles(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    T = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    ok = ((T >= 0) & (T < len(vertices))).all(axis=1)
+    ok &= (T[:, 0] != T[:, 1]) & (T[:, 1] != T[:, 2]) & (T[:, 2] != T[:, 0])
+    return T[ok]
+
+def simplify_levels(vertices: np.ndarray, triangles: np.ndarray, targets: List[int]):
+    """
+    Simplifica progressivamente até cada alvo de triângulos (decrescente); gera (V, T) compactados
+    por nível. Para quando uma passada não consegue mais colapsar nada.
+    """
+    V = np.array(vertices, dtype=np.float64)
+    T = _valid_triangles(V, triangles)
+    Q = _vertex_quadrics(V, T)
+    for target in targets:
+        stalled = False
+        while len(T) > target:
+            # cada colapso remove ~2 faces
+            T, n = _collapse_pass(V, T, Q, max(1, (len(T) - target + 1) // 2))
+            if n == 0:
+                stalled = True
+                break
+        yield _compact(V, T)
+        if stalled:
+            return
+
+def simplify(vertices: np.ndarray, triangles: np.ndarray, target_triangles: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Malha simplificada com ~target_triangles faces (ou o mínimo alcançável)."""
+    for level in simplify_levels(vertices, triangles, [target_triangles]):
+        return level
+    return _compact(np.asarray(vertices, dtype=np.float64), _valid_triangles(vertices, triangles))
+
+def build_lod_chain(m: "mesh_mod.Mesh",
+                    ratio: float = LOD_RATIO,
+                    min_triangles: int = LOD_MIN_TRIANGLES,
+                    max_levels: int = LOD_MAX_LEVELS) -> List["mesh_mod.Mesh"]:
+    """
+    Cadeia [malha original, LOD1, LOD2, ...] com ~ratio vezes os triângulos do nível anterior.
+    Malhas pequenas (< BUILD_MIN_TRIANGLES) ficam só com o nível 0.
+    """
+    chain = [m]
+    n = len(m["triangles"])
+    if n < BUILD_MIN_TRIANGLES:
+        return chain
+    targets = []
+    while len(targets) < max_levels:
+        n = int(n * ratio)
+        if n < min_triangles:
+            break
+        targets.append(n)
+    for i, (V, T) in enumerate(simplify_levels(m["vertices"], m["triangles"], targets), start=1):
+        if len(T) >= len(chain[-1]["triangles"]):
+            break
+        chain.append(mesh_mod.make_mesh(V, T, centroid=m["centroid"], name=f"{m['name']}@lod{i}"))
+    return chain
+
+# ------------------------------------------------------------------ escolha do nível
+
+def projected_area_px(m: "mesh_mod.Mesh", cam, width: int, height: int) -> float:
+    """Área aproximada (pixels) da esfera envolvente projetada; a tela inteira se a câmera estiver dentro."""
+    bmin = np.asarray(m["bounds_min"]); bmax = np.asarray(m["bounds_max"])
+    center = 0.5 * (bmin + bmax)
+    radius = 0.5 * float(np.linalg.norm(bmax - bmin))
+    basis = transform.compute_camera_basis(cam)
+    z = float(np.dot(center - np.asarray(basis["C"]), np.asarray(basis["n"])))
+    screen = float(width * height)
+    if z <= radius:
+        return screen
+    r_px = radius * float(cam.get("d", 1.0)) / (z * float(cam.get("hx", 1.0))) * (width / 2.0)
+    return min(math.pi * r_px * r_px, screen)
+
+def select_lod(chain: List["mesh_mod.Mesh"], cam, width: int, height: int,
+               ms_per_triangle: Optional[float] = None,
+               budget_ms: float = FRAME_BUDGET_MS) -> int:
+    """
+    Nível para a câmera em movimento: o mais detalhado cujo número de triângulos cabe tanto
+    no tamanho em tela (PIXELS_PER_TRIANGLE) quanto no orçamento de tempo do frame
+    (ms_per_triangle medido nos frames anteriores; None = ignora o orçamento).
+    """
+    limit = projected_area_px(chain[0], cam, width, height) / PIXELS_PER_TRIANGLE
+    if ms_per_triangle:
+        limit = min(limit, budget_ms / ms_per_triangle)
+    for i, level in enumerate(chain):
+        if len(level["triangles"]) <= limit:
+            return i
+    return len(chain) - 1
@@ -1,21 +1,36 @@
 # main.py (inicia automaticamente, sem precisar digitar nome)
+import argparse
 import os
 import sys
 import time
 import glob
 import math
 
-import byu_loader
+import numpy as np
+
+import mesh_cache
 import camera
-import transform
-import projection
 import rasterizer
+import pipeline
 import display
+import scheduler
+import perf
+import lod
+import mesh_loader
+import watcher
+import scene as scene_mod
+from transform import cartesian_from_spherical, spherical_from_cartesian
 
 # resolução padrão
 WIDTH = 800
 HEIGHT = 600
 
+# cores das camadas
+FILL_COLOR = pipeline.FILL_COLOR
+OUTLINE_COLOR = (255, 0, 0)
+VERTEX_COLOR = (0, 255, 0)
+PICK_COLOR = (255, 200, 0)
+
 # UI list settings
 OBJ_LIST_TOPLEFT = (8, 8)
 OBJ_LIST_WIDTH = 220
@@ -27,6 +42,13 @@ ELEVATION_SENSITIVITY = 0.006  # vertical
 ELEVATION_MIN = -math.radians(89.0)
 ELEVATION_MAX = math.radians(89.0)
 
+# LOD durante a interação: volta ao detalhe total após a câmera ficar parada por LOD_IDLE_S
+LOD_IDLE_S = 0.25
+# pré-visualização em baixa resolução durante a interação (1/PREVIEW_SCALE em cada eixo);
+# parada a câmera, o frame é refinado (escala dividida por 2 a cada frame) até a resolução total
+PREVIEW_SCALE = 2
+FRAME_MS_SMOOTHING = 0.3  # média exponencial do custo por triângulo
+
 
 def find_formas_objects(folder: str = "formas"):
     """Retorna lista ordenada de nomes de objetos .byu encontrados na pasta."""
@@ -40,24 +62,45 @@ def find_formas_objects(folder: str = "formas"):
     return names
 
 
-def load_mesh_for_name(name: str, folder: str = "formas"):
+def mesh_path_for_name(name: str, folder: str = "formas") -> str:
     path = os.path.join(folder, name + ".byu")
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Arquivo BYU não encontrado: {path}")
-    verts, tris = byu_loader.load_byu(path)
-    return verts, tris
+    return path
+
+
+def load_mesh_for_name(name: str, folder: str = "formas"):
+    """Carrega a malha pelo cache binário (memmap); só faz parse do .byu se o cache estiver inválido."""
+    return mesh_cache.load_mesh_cached(mesh_path_for_name(name, folder))
 
 
-def compute_centroid(vertices):
-    if not vertices:
-        return (0.0, 0.0, 0.0)
-    sx = sy = sz = 0.0
-    for (x, y, z) in vertices:
-        sx += x
-        sy += y
-        sz += z
-    n = len(vertices)
-    return (sx / n, sy / n, sz / n)
+def build_lods(mesh, path: str):
+    """
+    Cadeia de LODs da malha carregada (nível 0 = malha original), pelo cache binário:
+    a simplificação (lod.build_lod_chain) só roda quando o .byu muda.
+    """
+    t0 = time.perf_counter()
+    chain = mesh_cache.load_lods_cached(path, mesh)
+    if len(chain) > 1:
+        sizes = " / ".join(str(len(m["triangles"])) for m in chain)
+        print(f"LODs de '{mesh['name']}': {sizes} triângulos ({time.perf_counter() - t0:.2f}s)")
+    return chain
+
+
+def load_mesh_and_lods(name: str):
+    """Função de carga do mesh_loader (roda na thread de segundo plano): malha + cadeia de LODs."""
+    path = mesh_path_for_name(name)
+    mesh = mesh_cache.load_mesh_cached(path)
+    return mesh, build_lods(mesh, path)
+
+
+def frame_camera_on(cam, center, radius):
+    """Afasta a câmera (mesma direção de visão) até a esfera (center, radius) caber no campo de visão."""
+    n = np.asarray(cam["N"], dtype=np.float64)
+    n /= np.linalg.norm(n)
+    half = math.atan(min(float(cam.get("hx", 1.0)), float(cam.get("hy", 1.0))) / float(cam.get("d", 1.0)))
+    dist = radius / math.sin(half) * 1.05
+    cam["C"] = tuple(float(x) for x in np.asarray(center) - n * dist)
 
 
 def vec_sub(a, b): return (a[0]-b[0], a[1]-b[1], a[2]-b[2])
@@ -66,68 +109,88 @@ def vec_scale(a, s): return (a[0]*s, a[1]*s, a[2]*s)
 def vec_length(a): return math.sqrt(a[0]**2 + a[1]**2 + a[2]**2)
 
 
-def cartesian_from_spherical(r, az, el):
-    x = r * math.cos(el) * math.sin(az)
-    y = r * math.sin(el)
-    z = r * math.cos(el) * math.cos(az)
-    return (x, y, z)
-
-
-def spherical_from_cartesian(v):
-    x, y, z = v
-    r = math.sqrt(x*x + y*y + z*z)
-    if r == 0:
-        return (0.0, 0.0, 0.0)
-    az = math.atan2(x, z)
-    el = math.asin(y / r)
-    return (r, az, el)
-
-
-def build_frame(verts, tris, cam, width, height):
-    basis = transform.compute_camera_basis(cam)
-    view_coords = transform.world_to_view_vertices(verts, basis)
-    proj_results = projection.world_view_to_screen_list(view_coords, cam, width, height)
-    tri_pixels_map = rasterizer.rasterize_mesh(tris, proj_results, width, height)
-    all_pixels = set()
-    for pset in tri_pixels_map.values():
-        all_pixels.update(pset)
-    print("\n== Debug pipeline (resumo) ==")
-    print(f"Vértices: {len(verts)}  |  Triângulos: {len(tris)}")
-    print(f"Pixels preenchidos (todos triângulos): {len(all_pixels)}")
-    if all_pixels:
-        sample = sorted(list(all_pixels))[:10]
-        print(f"Amostra de pixels: {sample}")
+def build_frame(mesh, cam, width, height, use_zbuffer=False, cull_backfaces=False, parallel=False,
+                shading="none", stats=None, picking=None):
+    """Executa o pipeline (pipeline.render_frame); tempos e contadores vão para stats (perf), se houver."""
+    return pipeline.render_frame(mesh, cam, width, height, use_zbuffer=use_zbuffer,
+                                 cull_backfaces=cull_backfaces, parallel=parallel,
+                                 shading=shading, stats=stats, picking=picking)
+
+
+def overlay_edges(mesh, proj_results):
+    """
+    Arestas únicas (índice da malha, mesh['edges']) dos triângulos do frame, em índices da
+    projeção compactada, só as com os dois extremos projetáveis. Aresta compartilhada sai uma vez.
+    """
+    used = np.zeros(len(mesh["edges"]), dtype=bool)
+    used[mesh["tri_edges"][proj_results["triangle_ids"]]] = True
+    ends = mesh["edges"][used]
+    # vertex_ids é ordenado: searchsorted leva o índice original ao compactado
+    local = np.searchsorted(proj_results["vertex_ids"], ends)
+    return local[proj_results["projectable"][local].all(axis=1)]
+
+
+def draw_overlays(framebuffer, mesh, proj_results, show_outline, show_vertices):
+    """
+    Desenha contorno e vértices direto no array do frame (vetorizado); cada camada só é
+    gerada se estiver ligada. Os vértices do frame já são únicos (projeção compactada).
+    """
+    px, py = proj_results["px"], proj_results["py"]
+    if show_outline:
+        e = overlay_edges(mesh, proj_results)
+        rasterizer.draw_lines(framebuffer, px[e[:, 0]], py[e[:, 0]], px[e[:, 1]], py[e[:, 1]], OUTLINE_COLOR)
+    if show_vertices:
+        v = np.flatnonzero(proj_results["projectable"])
+        rasterizer.draw_points(framebuffer, px[v], py[v], VERTEX_COLOR)
+    return framebuffer
+
+
+def pick_at(buffers, frame_mesh, proj_results, cam, pos, render_scale, scene=None):
+    """
+    Triângulo sob a posição 'pos' da janela, consultando os buffers de pipeline.pick_buffers
+    do frame na tela (possivelmente reduzido por render_scale). None no fundo; senão o dict
+    de pipeline.pick com 'label' (malha ou instância), 'source_triangle' e 'vertices'
+    (índices na malha de origem).
+    """
+    hit = pipeline.pick(*buffers, cam, pos[0] // render_scale, pos[1] // render_scale)
+    if hit is None:
+        return None
+    t = hit["triangle"]
+    if scene is None:
+        src = int(proj_results["triangle_ids"][t])
+        label, tris = frame_mesh["name"], frame_mesh["triangles"]
     else:
-        print("Nenhum pixel preenchido (fora do frustum?).")
-    print("================================\n")
-    return all_pixels, proj_results, tri_pixels_map
-
-
-def make_outline_and_vertices(tris, proj_results, width, height):
-    outline_pixels = set()
-    vertex_pixels = set()
-    for (a, b, c) in tris:
-        if a >= len(proj_results) or b >= len(proj_results) or c >= len(proj_results):
-            continue
-        pa = proj_results[a]["pixel"]
-        pb = proj_results[b]["pixel"]
-        pc = proj_results[c]["pixel"]
-        if pa[0] is None or pb[0] is None or pc[0] is None:
-            continue
-        outline_pixels.update(rasterizer.bresenham_line_pixels(pa[0], pa[1], pb[0], pb[1]))
-        outline_pixels.update(rasterizer.bresenham_line_pixels(pb[0], pb[1], pc[0], pc[1]))
-        outline_pixels.update(rasterizer.bresenham_line_pixels(pc[0], pc[1], pa[0], pa[1]))
-        for (vx, vy) in (pa, pb, pc):
-            for dx in (-1, 0, 1):
-                for dy in (-1, 0, 1):
-                    x = int(vx)+dx
-                    y = int(vy)+dy
-                    if 0 <= x < width and 0 <= y < height:
-                        vertex_pixels.add((x, y))
-    return outline_pixels, vertex_pixels
+        inst = int(frame_mesh["instance_ids"][t])
+        name = scene["instances"][inst]["mesh"]
+        src = int(frame_mesh["source_triangles"][t])
+        label, tris = f"{name} (instância {inst})", scene["meshes"][name]["triangles"]
+    hit.update(label=label, source_triangle=src, vertices=tuple(int(v) for v in tris[src]))
+    return hit
+
+
+def describe_pick(hit):
+    x, y, z = hit["world"]
+    return (f"{hit['label']}: triângulo {hit['source_triangle']} vértices {hit['vertices']} "
+            f"em ({x:.3f}, {y:.3f}, {z:.3f})")
+
+
+def draw_pick(framebuffer, frame_tris, proj_results, hit):
+    """Destaca as arestas do triângulo selecionado direto no array do frame."""
+    px, py = proj_results["px"], proj_results["py"]
+    a = np.asarray(frame_tris[hit["triangle"]])
+    b = np.roll(a, -1)
+    rasterizer.draw_lines(framebuffer, px[a], py[a], px[b], py[b], PICK_COLOR)
+    return framebuffer
 
 
 def main():
+    ap = argparse.ArgumentParser(description="Visualizador 3D de malhas .byu.")
+    ap.add_argument("--scene", metavar="CENA.txt",
+                    help="abre uma cena com várias instâncias das malhas de formas/ (ver cena.txt)")
+    ap.add_argument("--trace", metavar="ARQ.json",
+                    help="grava um trace por estágio (chrome://tracing / Perfetto)")
+    args = ap.parse_args()
+
     # 1️⃣ buscar objetos
     objects = find_formas_objects("formas")
     if not objects:
@@ -138,13 +201,28 @@ def main():
     # 2️⃣ carregar o primeiro objeto
     current_obj_name = objects[0]
     print(f"Carregando objeto inicial: {current_obj_name}")
-    verts, tris = load_mesh_for_name(current_obj_name)
-    centroid = compute_centroid(verts)
+    # malhas carregam em segundo plano; o LRU guarda a atual e as vizinhas da lista
+    loader = mesh_loader.new_loader(load_mesh_and_lods)
+    scene_reloads = set()  # malhas da cena sendo recarregadas em segundo plano
+    mesh, lods = mesh_loader.load_now(loader, current_obj_name)
+    mesh_loader.prefetch(loader, mesh_loader.neighbors(objects, current_obj_name))
+    loading_name = None
+    centroid = mesh["centroid"]
 
     # 3️⃣ carregar câmera
     camfile = "camera.txt"
     cam = camera.load_camera(camfile)
     camera.pretty_print_camera(cam)
+    # polling de formas/*.byu e do camera.txt (hot reload; arquivos sem mudança não são relidos)
+    watch = watcher.new_watcher("formas", "*.byu", files=[camfile])
+
+    # cena (opcional): a câmera orbita o centro da cena, enquadrada pela esfera envolvente
+    scene = None
+    if args.scene:
+        scene = scene_mod.load_scene(args.scene)
+        centroid, scene_radius = scene_mod.scene_bounds(scene)
+        frame_camera_on(cam, centroid, scene_radius)
+        print(f"Cena '{args.scene}': {len(scene['instances'])} instâncias de {len(scene['meshes'])} malhas")
 
     # converter posição atual para esférico
     v_cent_cam = vec_sub(tuple(cam['C']), centroid)
@@ -159,101 +237,122 @@ def main():
 
     show_outline = False
     show_vertices = False
-
-    # 5️⃣ construir e desenhar frame
-    all_pixels, proj_results, tri_pixels_map = build_frame(verts, tris, cam, WIDTH, HEIGHT)
-    outline_pixels, vertex_pixels = make_outline_and_vertices(tris, proj_results, WIDTH, HEIGHT)
-    display.clear_screen(screen, (0, 0, 0))
-    display.draw_pixels(screen, all_pixels, (255, 255, 255))
-    object_rects = display.render_object_list_with_highlight(
-        screen, objects, top_left=OBJ_LIST_TOPLEFT, width=OBJ_LIST_WIDTH,
-        font_size=OBJ_FONT_SIZE, selected_index=0
-    )
+    use_zbuffer = False
+    # back-face culling ligado por padrão só em malhas fechadas e bem orientadas
+    cull_backfaces = mesh["closed"] if scene is None else all(m["closed"] for m in scene["meshes"].values())
+    parallel = False
+    shading = "none"       # um de pipeline.SHADING_MODES
+    show_pick = False      # inspeção contínua do triângulo sob o cursor
+    pick_pos = None        # posição (janela) da última consulta: clique ou cursor
+    pick_report = False    # imprimir o resultado da próxima consulta (clique)
+    picked = None
+    show_hud = False
+    # instrumentação só existe com HUD ou trace ligados; senão stats = None e o pipeline não mede nada
+    trace_stats = perf.new_stats(args.trace) if args.trace else None
+    hud_stats = None
+    use_lod = True
+    camera_moving = False
+    last_move_t = 0.0
+    lod_level = 0          # nível do frame atualmente na tela
+    use_preview = True
+    render_scale = 1       # fator de redução do frame atualmente na tela
+    ms_per_triangle = None
 
     help_lines = [
         "Comandos:",
         "R - recarregar camera.txt",
         "O - toggle contorno",
         "V - toggle vértices",
+        "D - toggle z-buffer",
+        "B - toggle back-face culling",
+        "M - toggle rasterização paralela",
+        "S - sombreamento (nenhum/flat/Gouraud)",
         "Z/X - zoom in/out",
         "P - salvar screenshot",
+        "H - HUD de desempenho",
+        "L - toggle LOD durante o movimento",
+        "F - toggle pré-visualização em baixa resolução",
         "Clique (esq) nome na lista - trocar objeto",
+        "Clique (esq) no objeto - identificar triângulo",
+        "I - inspecionar triângulo sob o cursor",
         "Segure botão direito - orbitar câmera",
         "ESC - sair"
     ]
-    display.render_help(screen, help_lines)
-    display.present()
 
     import pygame
     clock = pygame.time.Clock()
+    sched = scheduler.new_scheduler()
     running = True
     rotating = False
     last_mouse = (0, 0)
+    object_rects = []
+    framebuffer = proj_results = frame_mesh = frame_tris = None
+    pick_buffers = None    # (IDs, profundidade) do frame na tela: da própria passada com z-buffer,
+                           # ou gerados na 1ª consulta (frame sem z-buffer)
 
     print("✅ Sistema iniciado. Use o mouse e teclas conforme instruções na tela.")
 
-    # 6️⃣ loop principal
+    # 6️⃣ loop principal: eventos só mudam estado; desenho no máximo 1x por tick
     while running:
+        motion_dx = motion_dy = 0
+        motion_events = 0
+        pending_load = None
+
         for ev in pygame.event.get():
             if ev.type == pygame.QUIT:
                 running = False
+                scheduler.count_event(sched, "applied")
 
             elif ev.type == pygame.MOUSEBUTTONDOWN:
                 if ev.button == 1:  # clique esquerdo = troca objeto
-                    mx, my = ev.pos
+                    hit = None
                     for (idx, rect, name) in object_rects:
-                        if rect.collidepoint((mx, my)):
-                            print(f"🟢 Carregando '{name}'...")
-                            verts, tris = load_mesh_for_name(name)
-                            current_obj_name = name
-                            centroid = compute_centroid(verts)
-                            v_cent_cam = vec_sub(tuple(cam['C']), centroid)
-                            r, az, el = spherical_from_cartesian(v_cent_cam)
-                            all_pixels, proj_results, tri_pixels_map = build_frame(verts, tris, cam, WIDTH, HEIGHT)
-                            outline_pixels, vertex_pixels = make_outline_and_vertices(tris, proj_results, WIDTH, HEIGHT)
-                            display.clear_screen(screen, (0, 0, 0))
-                            display.draw_pixels(screen, all_pixels, (255, 255, 255))
-                            object_rects = display.render_object_list_with_highlight(
-                                screen, objects, top_left=OBJ_LIST_TOPLEFT, width=OBJ_LIST_WIDTH,
-                                font_size=OBJ_FONT_SIZE, selected_index=(objects.index(current_obj_name))
-                            )
-                            display.render_help(screen, help_lines)
-                            display.present()
+                        if rect.collidepoint(ev.pos):
+                            hit = name
                             break
+                    if hit is not None and (hit != current_obj_name or scene is not None):
+                        # vários cliques no mesmo tick: vale o último
+                        scheduler.count_event(sched, "coalesced" if pending_load else "applied")
+                        pending_load = hit
+                    elif hit is None:
+                        # clique fora da lista: seleção do triângulo (resolvida no desenho)
+                        pick_pos, pick_report = ev.pos, True
+                        scheduler.mark_dirty(sched, scheduler.OVERLAY)
+                        scheduler.count_event(sched, "applied")
+                    else:
+                        scheduler.count_event(sched, "dropped")
                 elif ev.button == 3:
                     rotating = True
                     last_mouse = ev.pos
+                    scheduler.count_event(sched, "applied")
+                else:
+                    scheduler.count_event(sched, "dropped")
 
             elif ev.type == pygame.MOUSEBUTTONUP:
                 if ev.button == 3:
                     rotating = False
+                    scheduler.count_event(sched, "applied")
+                else:
+                    scheduler.count_event(sched, "dropped")
 
             elif ev.type == pygame.MOUSEMOTION and rotating:
+                # acumular o deslocamento; a câmera é atualizada uma vez após a fila
                 mx, my = ev.pos
                 lx, ly = last_mouse
-                dx, dy = mx - lx, my - ly
+                motion_dx += mx - lx
+                motion_dy += my - ly
                 last_mouse = (mx, my)
-                az += dx * AZIMUTH_SENSITIVITY
-                el += -dy * ELEVATION_SENSITIVITY
-                el = max(ELEVATION_MIN, min(ELEVATION_MAX, el))
-                Crel = cartesian_from_spherical(r, az, el)
-                Cnew = vec_add(centroid, Crel)
-                cam['C'] = Cnew
-                cam['N'] = vec_sub(centroid, Cnew)
-                if 'V' not in cam:
-                    cam['V'] = (0, 1, 0)
-                all_pixels, proj_results, tri_pixels_map = build_frame(verts, tris, cam, WIDTH, HEIGHT)
-                outline_pixels, vertex_pixels = make_outline_and_vertices(tris, proj_results, WIDTH, HEIGHT)
-                display.clear_screen(screen, (0, 0, 0))
-                display.draw_pixels(screen, all_pixels, (255, 255, 255))
-                object_rects = display.render_object_list_with_highlight(
-                    screen, objects, top_left=OBJ_LIST_TOPLEFT, width=OBJ_LIST_WIDTH,
-                    font_size=OBJ_FONT_SIZE, selected_index=(objects.index(current_obj_name))
-                )
-                display.render_help(screen, help_lines)
-                display.present()
+                motion_events += 1
+                scheduler.count_event(sched, "coalesced" if motion_events > 1 else "applied")
+
+            elif ev.type == pygame.MOUSEMOTION and show_pick:
+                scheduler.count_event(sched, "coalesced" if pick_pos == ev.pos else "applied")
+                pick_pos = ev.pos
+                scheduler.mark_dirty(sched, scheduler.OVERLAY)
 
             elif ev.type == pygame.KEYDOWN:
+                handled = True
+                changed = scheduler.FRAME
                 if ev.key == pygame.K_ESCAPE:
                     running = False
                 elif ev.key == pygame.K_r:
@@ -263,40 +362,232 @@ def main():
                 elif ev.key == pygame.K_o:
                     show_outline = not show_outline
                     print("Outline:", show_outline)
+                    changed = scheduler.OVERLAY
                 elif ev.key == pygame.K_v:
                     show_vertices = not show_vertices
                     print("Vértices:", show_vertices)
+                    changed = scheduler.OVERLAY
+                elif ev.key == pygame.K_d:
+                    use_zbuffer = not use_zbuffer
+                    print("Z-buffer:", use_zbuffer)
+                elif ev.key == pygame.K_b:
+                    cull_backfaces = not cull_backfaces
+                    print("Back-face culling:", cull_backfaces)
+                elif ev.key == pygame.K_m:
+                    parallel = not parallel
+                    print("Rasterização paralela:", parallel)
+                elif ev.key == pygame.K_s:
+                    modes = pipeline.SHADING_MODES
+                    shading = modes[(modes.index(shading) + 1) % len(modes)]
+                    print("Sombreamento:", shading)
+                elif ev.key == pygame.K_i:
+                    show_pick = not show_pick
+                    print("Inspeção sob o cursor:", show_pick)
+                    pick_pos = pygame.mouse.get_pos() if show_pick else None
+                    changed = scheduler.OVERLAY
+                elif ev.key == pygame.K_l:
+                    use_lod = not use_lod
+                    print("LOD:", use_lod)
+                elif ev.key == pygame.K_f:
+                    use_preview = not use_preview
+                    print("Pré-visualização:", use_preview)
                 elif ev.key == pygame.K_z:
                     cam['d'] = float(cam.get('d', 1.0)) * 1.25
+                    camera_moving, last_move_t = True, time.perf_counter()
                 elif ev.key == pygame.K_x:
                     cam['d'] = float(cam.get('d', 1.0)) / 1.25
+                    camera_moving, last_move_t = True, time.perf_counter()
+                elif ev.key == pygame.K_h:
+                    show_hud = not show_hud
+                    hud_stats = (trace_stats or perf.new_stats()) if show_hud else None
+                    changed = scheduler.OVERLAY
                 elif ev.key == pygame.K_p:
                     fname = f"screenshot_{int(time.time())}.png"
-                    import pygame
                     pygame.image.save(screen, fname)
                     print(f"💾 Screenshot salvo: {fname}")
-
-                # redesenha sempre após qualquer tecla
-                all_pixels, proj_results, tri_pixels_map = build_frame(verts, tris, cam, WIDTH, HEIGHT)
-                outline_pixels, vertex_pixels = make_outline_and_vertices(tris, proj_results, WIDTH, HEIGHT)
-                display.clear_screen(screen, (0, 0, 0))
-                display.draw_pixels(screen, all_pixels, (255, 255, 255))
-                if show_outline:
-                    display.draw_pixels(screen, outline_pixels, (255, 0, 0))
-                if show_vertices:
-                    display.draw_pixels(screen, vertex_pixels, (0, 255, 0))
+                    changed = None
+                else:
+                    # tecla sem função: não redesenha
+                    handled = False
+                scheduler.count_event(sched, "applied" if handled else "dropped")
+                if handled and changed is not None:
+                    scheduler.mark_dirty(sched, changed)
+
+            else:
+                scheduler.count_event(sched, "dropped")
+
+        changes = watcher.poll(watch)
+        if changes is not None:
+            if camfile in changes["changed"] or camfile in changes["added"]:
+                print("📷 camera.txt alterado — recarregando")
+                cam = camera.load_camera(camfile)
+                v_cent_cam = vec_sub(tuple(cam['C']), centroid)
+                r, az, el = spherical_from_cartesian(v_cent_cam)
+                scheduler.mark_dirty(sched, scheduler.FRAME)
+            byu = {k: [os.path.splitext(os.path.basename(p))[0] for p in v if p.endswith(".byu")]
+                   for k, v in changes.items()}
+            if byu["added"] or byu["removed"]:
+                objects = find_formas_objects("formas")
+                print(f"📂 formas/: +{byu['added']} -{byu['removed']}")
+                scheduler.mark_dirty(sched, scheduler.OVERLAY)
+            for name in byu["changed"] + byu["removed"]:
+                mesh_loader.invalidate(loader, name)
+            for name in byu["changed"]:
+                print(f"♻️ '{name}' alterado")
+                if scene is not None and name in scene["meshes"]:
+                    # recarga em segundo plano; a versão antiga fica na cena até terminar
+                    scene_reloads.add(name)
+                    mesh_loader.request(loader, name)
+                elif scene is None and name == current_obj_name and pending_load is None:
+                    pending_load = name  # recarrega em segundo plano; a versão antiga fica na tela
+            if current_obj_name in byu["removed"]:
+                print(f"⚠️ '{current_obj_name}' foi removido de formas/ (continua na tela até trocar de objeto)")
+
+        # troca de objeto: do cache na hora; senão segue mostrando a malha atual até a carga terminar
+        ready = None
+        if pending_load is not None:
+            if mesh_loader.request(loader, pending_load):
+                ready = (pending_load, mesh_loader.cached(loader, pending_load))
+                loading_name = None
+            else:
+                print(f"🟢 Carregando '{pending_load}' em segundo plano...")
+                loading_name = pending_load
+                scheduler.mark_dirty(sched, scheduler.OVERLAY)
+        for name, value, err in mesh_loader.poll(loader):
+            if err is not None:
+                print(f"⚠️ Falha ao carregar '{name}': {err}")
+            if name in scene_reloads:
+                scene_reloads.discard(name)
+                if scene is not None and name in scene["meshes"]:  # ainda no modo cena
+                    if err is not None:
+                        print(f"⚠️ Mantendo a versão anterior de '{name}' na cena")
+                    else:
+                        scene_mod.add_mesh(scene, name, value[0])
+                        cull_backfaces = all(m["closed"] for m in scene["meshes"].values())
+                        scheduler.mark_dirty(sched, scheduler.FRAME)
+            if name == loading_name:
+                loading_name = None
+                if err is None:
+                    ready = (name, value)
+                else:
+                    scheduler.mark_dirty(sched, scheduler.OVERLAY)
+
+        if ready is not None:
+            current_obj_name, (mesh, lods) = ready
+            ms_per_triangle = None
+            lod_level = 0
+            mesh_loader.prefetch(loader, mesh_loader.neighbors(objects, current_obj_name))
+            scene = None  # escolher um objeto na lista sai do modo cena
+            centroid = mesh["centroid"]
+            cull_backfaces = mesh["closed"]
+            v_cent_cam = vec_sub(tuple(cam['C']), centroid)
+            r, az, el = spherical_from_cartesian(v_cent_cam)
+            scheduler.mark_dirty(sched, scheduler.FRAME)
+
+        if motion_events and (motion_dx or motion_dy):
+            az += motion_dx * AZIMUTH_SENSITIVITY
+            el += -motion_dy * ELEVATION_SENSITIVITY
+            el = max(ELEVATION_MIN, min(ELEVATION_MAX, el))
+            Crel = cartesian_from_spherical(r, az, el)
+            Cnew = vec_add(centroid, Crel)
+            cam['C'] = Cnew
+            cam['N'] = vec_sub(centroid, Cnew)
+            if 'V' not in cam:
+                cam['V'] = (0, 1, 0)
+            camera_moving, last_move_t = True, time.perf_counter()
+            scheduler.mark_dirty(sched, scheduler.FRAME)
+
+        # câmera parada: começa o refinamento (malha completa, depois resolução total)
+        if camera_moving and not rotating and time.perf_counter() - last_move_t >= LOD_IDLE_S:
+            camera_moving = False
+            if lod_level != 0 or render_scale > 1:
+                scheduler.mark_dirty(sched, scheduler.FRAME)
+
+        if not running:
+            break
+        dirty = scheduler.take_dirty(sched)
+        if dirty:
+            stats = hud_stats or trace_stats
+            if scheduler.FRAME in dirty:
+                if camera_moving:
+                    use_level = use_lod and scene is None
+                    lod_level = lod.select_lod(lods, cam, WIDTH, HEIGHT, ms_per_triangle) if use_level else 0
+                    render_scale = PREVIEW_SCALE if use_preview else 1
+                elif lod_level != 0:
+                    # 1º passo do refinamento: malha completa, ainda na resolução da pré-visualização
+                    lod_level = 0
+                else:
+                    render_scale = max(1, render_scale // 2)
+                t0 = time.perf_counter()
+                fw, fh = -(-WIDTH // render_scale), -(-HEIGHT // render_scale)
+                picking = {}
+                if scene is not None:
+                    # o lote da cena tem edges/tri_edges: serve de malha para as sobreposições
+                    framebuffer, proj_results, frame_mesh = scene_mod.render_scene(
+                        scene, cam, fw, fh, use_zbuffer, cull_backfaces, parallel, shading, stats, picking)
+                    frame_tris = frame_mesh["triangles"]
+                else:
+                    frame_mesh = lods[lod_level]
+                    framebuffer, proj_results, frame_tris = build_frame(frame_mesh, cam, fw, fh, use_zbuffer,
+                                                                        cull_backfaces, parallel, shading, stats,
+                                                                        picking)
+                pick_buffers = (picking["ids"], picking["depth"]) if picking else None
+                # custo por triângulo da malha desenhada, para o orçamento de tempo do LOD
+                sample = (time.perf_counter() - t0) * 1000.0 / max(1, len(frame_mesh["triangles"]))
+                ms_per_triangle = sample if ms_per_triangle is None else (
+                    FRAME_MS_SMOOTHING * sample + (1.0 - FRAME_MS_SMOOTHING) * ms_per_triangle)
+                perf.count(stats, "nível LOD", lod_level)
+                perf.count(stats, "escala", render_scale)
+                if not camera_moving and (lod_level != 0 or render_scale > 1):
+                    # refinamento continua no próximo tick (eventos são atendidos entre os passos)
+                    scheduler.mark_dirty(sched, scheduler.FRAME)
+            if camera_moving and not show_pick:
+                pick_pos = None  # seleção por clique não acompanha a câmera
+            picked = None
+            if pick_pos is not None and not camera_moving:
+                with perf.stage(stats, "seleção"):
+                    if pick_buffers is None:
+                        pick_buffers = pipeline.pick_buffers(frame_tris, proj_results,
+                                                             framebuffer.shape[1], framebuffer.shape[0])
+                    picked = pick_at(pick_buffers, frame_mesh, proj_results, cam, pick_pos, render_scale, scene)
+                if pick_report:
+                    print("🎯", describe_pick(picked) if picked is not None else "nenhum triângulo sob o clique")
+                    pick_report = False
+            view = framebuffer
+            if show_outline or show_vertices or picked is not None:
+                with perf.stage(stats, "overlays"):
+                    view = draw_overlays(framebuffer.copy(), frame_mesh, proj_results, show_outline, show_vertices)
+                    if picked is not None:
+                        draw_pick(view, frame_tris, proj_results, picked)
+            if render_scale > 1:
+                with perf.stage(stats, "upscale"):
+                    view = display.upscale_nearest(view, render_scale, WIDTH, HEIGHT)
+            with perf.stage(stats, "blit"):
+                display.blit_framebuffer(screen, view)
+            with perf.stage(stats, "ui"):
                 object_rects = display.render_object_list_with_highlight(
                     screen, objects, top_left=OBJ_LIST_TOPLEFT, width=OBJ_LIST_WIDTH,
-                    font_size=OBJ_FONT_SIZE, selected_index=(objects.index(current_obj_name))
+                    font_size=OBJ_FONT_SIZE, selected_index=(objects.index(current_obj_name)
+                                                         if scene is None and current_obj_name in objects else None)
                 )
                 display.render_help(screen, help_lines)
-                display.present()
+                if loading_name is not None:
+                    display.render_status(screen, f"Carregando '{loading_name}'...")
+                if picked is not None:
+                    display.render_status(screen, describe_pick(picked), bottom=True)
+            if show_hud:
+                display.render_hud(screen, perf.hud_lines(hud_stats))
+            display.present()
+            perf.frame_done(stats)
 
         clock.tick(60)
 
+    mesh_loader.shutdown(loader)
     display.quit_pygame()
+    perf.close(trace_stats)
+    print("Agendador:", scheduler.summary(sched))
     print("Aplicação finalizada.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
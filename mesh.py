@@ -0,0 +1,159 @@
+# mesh.py
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+import bvh as bvh_mod
+
+# Malha: dict com arrays NumPy + dados derivados calculados uma única vez no carregamento
+#   'vertices'  : float64 (N,3)
+#   'triangles' : int32 (M,3), 0-based
+#   'centroid'  : (x,y,z)
+#   'bounds_min', 'bounds_max' : (x,y,z)
+#   'bvh'       : hierarquia de grupos de triângulos (bvh.build_bvh) para culling de frustum
+#   'face_normals' : float64 (M,3) normais unitárias (orientadas para fora quando possível)
+#   'face_offsets' : float64 (M,)  n·P de cada face (plano do triângulo)
+#   'vertex_normals' : float32 (N,3) normais unitárias por vértice (média ponderada por área), p/ Gouraud
+#   'closed'    : malha fechada e com orientação consistente (back-face culling seguro)
+#   'edges'     : int32 (E,2) arestas únicas (a < b), para o contorno
+#   'tri_edges' : int32 (M,3) índices em 'edges' das arestas de cada triângulo
+Mesh = Dict[str, object]
+
+# dados derivados que make_mesh aceita prontos (ex.: lidos do cache binário)
+DERIVED_KEYS = ("bvh", "face_normals", "face_offsets", "vertex_normals", "closed", "edges", "tri_edges")
+Vec3 = Tuple[float, float, float]
+
+def compute_bounds(vertices: np.ndarray) -> Tuple[Vec3, Vec3]:
+    if len(vertices) == 0:
+        return (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+    bmin = vertices.min(axis=0)
+    bmax = vertices.max(axis=0)
+    return tuple(float(x) for x in bmin), tuple(float(x) for x in bmax)
+
+def compute_centroid(vertices: np.ndarray) -> Vec3:
+    if len(vertices) == 0:
+        return (0.0, 0.0, 0.0)
+    c = vertices.mean(axis=0)
+    return (float(c[0]), float(c[1]), float(c[2]))
+
+def _safe_triangles(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    tris = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(vertices) == 0:
+        return np.zeros_like(tris)
+    return np.clip(tris, 0, len(vertices) - 1)
+
+def compute_face_normals(vertices: np.ndarray, triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normais unitárias por face, (B-A) x (C-A), e o termo n·A do plano de cada face.
+    Se o volume assinado da malha for negativo (enrolamento para dentro) as normais são
+    invertidas, para apontarem para fora. Faces degeneradas ficam com normal (0,0,0).
+    """
+    verts = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    t = _safe_triangles(verts, triangles)
+    a = verts[t[:, 0]]; b = verts[t[:, 1]]; c = verts[t[:, 2]]
+    n = np.cross(b - a, c - a)
+    if len(t):
+        center = verts.mean(axis=0)
+        signed_volume = np.einsum("ij,ij->", a - center, np.cross(b - center, c - center))
+        if signed_volume < 0.0:
+            n = -n
+    lengths = np.linalg.norm(n, axis=1, keepdims=True)
+    n = np.divide(n, lengths, out=np.zeros_like(n), where=lengths > 0.0)
+    offsets = np.einsum("ij,ij->i", n, a)
+    return n, offsets
+
+def compute_vertex_normals(vertices: np.ndarray, triangles: np.ndarray,
+                           face_normals: np.ndarray) -> np.ndarray:
+    """
+    Normais por vértice: soma das normais das faces vizinhas ponderadas pela área (uma passada
+    vetorizada com bincount por componente) e normalização. Usa a orientação de face_normals
+    (já corrigida para fora). Vértices sem faces ficam com normal (0,0,0).
+    """
+    verts = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    t = _safe_triangles(verts, triangles)
+    a = verts[t[:, 0]]; b = verts[t[:, 1]]; c = verts[t[:, 2]]
+    area = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+    weighted = np.repeat(face_normals * area[:, None], 3, axis=0)   # uma linha por canto
+    corners = t.reshape(-1)
+    n = np.stack([np.bincount(corners, weights=weighted[:, k], minlength=len(verts)) for k in range(3)], axis=1)
+    lengths = np.linalg.norm(n, axis=1, keepdims=True)
+    n = np.divide(n, lengths, out=np.zeros_like(n), where=lengths > 0.0)
+    return n.astype(np.float32)
+
+def is_closed_consistent(triangles: np.ndarray) -> bool:
+    """Fechada (toda aresta em exatamente 2 faces) e com orientação consistente (cada aresta orientada aparece 1 vez)."""
+    t = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(t) == 0:
+        return False
+    directed = np.concatenate((t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]))
+    # aresta -> chave inteira única (unique 1D é bem mais rápido que unique por linhas)
+    base = int(t.max()) + 1
+    undirected = np.sort(directed, axis=1)
+    _, counts = np.unique(undirected[:, 0] * base + undirected[:, 1], return_counts=True)
+    if not (counts == 2).all():
+        return False
+    return len(np.unique(directed[:, 0] * base + directed[:, 1])) == len(directed)
+
+def build_edge_index(triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Índice de arestas únicas: (arestas (E,2) int32 com a < b, arestas de cada triângulo (M,3) int32
+    na ordem (0-1, 1-2, 2-0)). Aresta compartilhada por vários triângulos aparece uma vez só.
+    """
+    t = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+    if len(t) == 0:
+        return np.empty((0, 2), dtype=np.int32), np.empty((0, 3), dtype=np.int32)
+    pairs = np.sort(np.stack((t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]), axis=1), axis=2).reshape(-1, 2)
+    lo = int(pairs.min())
+    base = int(pairs.max()) - lo + 1
+    _, first, inverse = np.unique((pairs[:, 0] - lo) * base + (pairs[:, 1] - lo),
+                                  return_index=True, return_inverse=True)
+    return pairs[first].astype(np.int32), inverse.reshape(-1, 3).astype(np.int32)
+
+def backfacing(m: "Mesh", camera_pos: Vec3, tri_idx: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Máscara das faces de costas para a câmera em C: n·C - n·A <= 0
+    (um único produto matriz-vetor). Faces degeneradas nunca são descartadas.
+    Com tri_idx, testa só essas faces (máscara do mesmo tamanho de tri_idx).
+    """
+    normals = m["face_normals"]; offsets = m["face_offsets"]
+    if tri_idx is not None:
+        normals = normals[tri_idx]; offsets = offsets[tri_idx]
+    side = normals @ np.asarray(camera_pos, dtype=np.float64) - offsets
+    degenerate = ~normals.any(axis=1)
+    return (side <= 0.0) & ~degenerate
+
+def make_mesh(vertices: np.ndarray, triangles: np.ndarray,
+              centroid: Optional[Vec3] = None,
+              bounds: Optional[Tuple[Vec3, Vec3]] = None,
+              name: str = "",
+              derived: Optional[Dict[str, object]] = None) -> Mesh:
+    """
+    Monta o dict da malha. centroid/bounds podem vir prontos (ex.: do cache em disco);
+    se ausentes são calculados aqui. O mesmo vale para os dados derivados em 'derived'
+    (chaves de DERIVED_KEYS: 'bvh', normais, 'closed', arestas).
+    """
+    if centroid is None:
+        centroid = compute_centroid(vertices)
+    if bounds is None:
+        bounds = compute_bounds(vertices)
+    m = {
+        "name": name,
+        "vertices": vertices,
+        "triangles": triangles,
+        "centroid": tuple(centroid),
+        "bounds_min": tuple(bounds[0]),
+        "bounds_max": tuple(bounds[1]),
+    }
+    d = derived or {}
+    m["bvh"] = d["bvh"] if "bvh" in d else bvh_mod.build_bvh(vertices, triangles)
+    if "face_normals" in d and "face_offsets" in d:
+        m["face_normals"], m["face_offsets"] = d["face_normals"], d["face_offsets"]
+    else:
+        m["face_normals"], m["face_offsets"] = compute_face_normals(vertices, triangles)
+    m["vertex_normals"] = (d["vertex_normals"] if "vertex_normals" in d
+                           else compute_vertex_normals(vertices, triangles, m["face_normals"]))
+    m["closed"] = bool(d["closed"]) if "closed" in d else is_closed_consistent(triangles)
+    if "edges" in d and "tri_edges" in d:
+        m["edges"], m["tri_edges"] = d["edges"], d["tri_edges"]
+    else:
+        m["edges"], m["tri_edges"] = build_edge_index(triangles)
+    return m
@@ -0,0 +1,253 @@
+# mesh_cache.py
+# Cache binário (memory-mapped) das malhas .byu, guardado ao lado da pasta de formas.
+from typing import Optional
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+import byu_loader
+import lod
+import mesh as mesh_mod
+
+MAGIC = b"BYUMESH2"
+# magic, mtime_ns e tamanho do .byu de origem, n_vertices, n_triângulos, n_arestas,
+# n_nós da BVH, malha fechada (0/1), centróide(3), bounds_min(3), bounds_max(3)
+HEADER_STRUCT = struct.Struct("<8sqqqqqqq9d")
+HEADER_SIZE = 192          # cabeçalho ocupa um bloco fixo (resto é padding)
+ALIGN = 64                 # alinhamento do início de cada array no arquivo
+
+# índice da cadeia de LODs (cada nível >= 1 fica num .mesh próprio, no formato acima):
+# magic, mtime_ns e tamanho do .byu de origem, número de níveis gravados e os parâmetros
+# do lod.py usados (LOD_MIN_TRIANGLES, LOD_MAX_LEVELS, BUILD_MIN_TRIANGLES, LOD_RATIO)
+LODS_MAGIC = b"BYULODS1"
+LODS_STRUCT = struct.Struct("<8sqqqqqqd")
+
+def cache_dir_for(folder: str) -> str:
+    """Pasta do cache, irmã da pasta de formas (ex.: formas/ -> .formas_cache/)."""
+    folder = os.path.normpath(folder)
+    parent = os.path.dirname(folder)
+    return os.path.join(parent, "." + os.path.basename(folder) + "_cache")
+
+def cache_path_for(source_path: str) -> str:
+    folder = os.path.dirname(os.path.abspath(source_path))
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir_for(folder), name + ".mesh")
+
+def lods_path_for(source_path: str) -> str:
+    """Índice da cadeia de LODs (ex.: formas/vaso.byu -> .formas_cache/vaso.lods)."""
+    return os.path.splitext(cache_path_for(source_path))[0] + ".lods"
+
+def lod_level_path_for(source_path: str, level: int) -> str:
+    """Arquivo de um nível de LOD (ex.: .formas_cache/vaso@lod1.mesh)."""
+    return os.path.splitext(cache_path_for(source_path))[0] + f"@lod{level}.mesh"
+
+def _lod_params():
+    return lod.LOD_MIN_TRIANGLES, lod.LOD_MAX_LEVELS, lod.BUILD_MIN_TRIANGLES, lod.LOD_RATIO
+
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _fields(n_vertices: int, n_triangles: int, n_edges: int, n_nodes: int):
+    """(chave, dtype, forma) de cada array do arquivo, na ordem de gravação ('bvh.x' = m['bvh']['x'])."""
+    return [
+        ("vertices", "<f8", (n_vertices, 3)),
+        ("triangles", "<i4", (n_triangles, 3)),
+        ("face_normals", "<f8", (n_triangles, 3)),
+        ("face_offsets", "<f8", (n_triangles,)),
+        ("vertex_normals", "<f4", (n_vertices, 3)),
+        ("edges", "<i4", (n_edges, 2)),
+        ("tri_edges", "<i4", (n_triangles, 3)),
+        ("bvh.bmin", "<f8", (n_nodes, 3)),
+        ("bvh.bmax", "<f8", (n_nodes, 3)),
+        ("bvh.center", "<f8", (n_nodes, 3)),
+        ("bvh.radius", "<f8", (n_nodes,)),
+        ("bvh.left", "<i8", (n_nodes,)),
+        ("bvh.right", "<i8", (n_nodes,)),
+        ("bvh.start", "<i8", (n_nodes,)),
+        ("bvh.count", "<i8", (n_nodes,)),
+        ("bvh.order", "<i8", (n_triangles,)),
+    ]
+
+def _layout(n_vertices: int, n_triangles: int, n_edges: int, n_nodes: int):
+    """[(chave, dtype, forma, offset)] e tamanho total do arquivo."""
+    out = []
+    off = HEADER_SIZE
+    for key, dtype, shape in _fields(n_vertices, n_triangles, n_edges, n_nodes):
+        off = _align(off)
+        out.append((key, dtype, shape, off))
+        off += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return out, off
+
+def _get(m: mesh_mod.Mesh, key: str):
+    if key.startswith("bvh."):
+        return m["bvh"][key[4:]]
+    return m[key]
+
+def write_cache(cache_path: str, source_stat: os.stat_result, m: mesh_mod.Mesh):
+    """
+    Grava a malha e seus dados derivados (BVH, normais, arestas, 'closed') no formato
+    binário (escrita atômica: arquivo temporário + replace).
+    """
+    n_v, n_t = len(m["vertices"]), len(m["triangles"])
+    n_e, n_k = len(m["edges"]), len(m["bvh"]["start"])
+    layout, _ = _layout(n_v, n_t, n_e, n_k)
+    header = HEADER_STRUCT.pack(MAGIC, source_stat.st_mtime_ns, source_stat.st_size, n_v, n_t, n_e, n_k,
+                                int(bool(m["closed"])),
+                                *m["centroid"], *m["bounds_min"], *m["bounds_max"])
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            for key, dtype, shape, off in layout:
+                f.write(b"\0" * (off - f.tell()))
+                f.write(np.ascontiguousarray(_get(m, key), dtype=dtype).reshape(shape).tobytes())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _map_array(path: str, dtype: str, offset: int, shape) -> np.ndarray:
+    if shape[0] == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+def read_cache(cache_path: str, source_stat: os.stat_result) -> Optional[mesh_mod.Mesh]:
+    """
+    Abre o cache via memmap (vértices, triângulos e todos os dados derivados — nada é
+    recalculado). Retorna None se não existir, estiver corrompido, for de outra versão
+    do formato ou se mtime/tamanho do .byu de origem não baterem (cache inválido).
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            raw = f.read(HEADER_STRUCT.size)
+        file_size = os.path.getsize(cache_path)
+    except OSError:
+        return None
+    if len(raw) < HEADER_STRUCT.size:
+        return None
+    fields = HEADER_STRUCT.unpack(raw)
+    magic, mtime_ns, size, n_v, n_t, n_e, n_k, closed = fields[:8]
+    if magic != MAGIC:
+        return None
+    if mtime_ns != source_stat.st_mtime_ns or size != source_stat.st_size:
+        return None
+    layout, total = _layout(n_v, n_t, n_e, n_k)
+    if file_size < total:
+        return None
+    vals = fields[8:]
+    arrays = {key: _map_array(cache_path, dtype, off, shape) for key, dtype, shape, off in layout}
+    derived = {k: v for k, v in arrays.items() if not k.startswith("bvh.")}
+    derived["bvh"] = {k[4:]: v for k, v in arrays.items() if k.startswith("bvh.")}
+    derived["closed"] = bool(closed)
+    return mesh_mod.make_mesh(derived.pop("vertices"), derived.pop("triangles"),
+                              centroid=vals[0:3],
+                              bounds=(vals[3:6], vals[6:9]),
+                              name=os.path.splitext(os.path.basename(cache_path))[0],
+                              derived=derived)
+
+def write_lods(source_path: str, source_stat: os.stat_result, chain):
+    """
+    Grava os níveis 1.. da cadeia (um .mesh por nível) e por último o índice .lods, de
+    modo que um índice válido sempre aponta para níveis já gravados.
+    """
+    for i, level in enumerate(chain[1:], start=1):
+        write_cache(lod_level_path_for(source_path, i), source_stat, level)
+    index = lods_path_for(source_path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(index), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(LODS_STRUCT.pack(LODS_MAGIC, source_stat.st_mtime_ns, source_stat.st_size,
+                                     len(chain) - 1, *_lod_params()))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, index)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def read_lods(source_path: str, source_stat: os.stat_result, m: mesh_mod.Mesh):
+    """
+    Cadeia [m, LOD1, ...] a partir do cache (níveis via memmap, como read_cache).
+    None se o índice não existir, for de outro .byu/outros parâmetros ou faltar algum nível.
+    """
+    try:
+        with open(lods_path_for(source_path), "rb") as f:
+            raw = f.read(LODS_STRUCT.size)
+    except OSError:
+        return None
+    if len(raw) < LODS_STRUCT.size:
+        return None
+    magic, mtime_ns, size, n_levels, *params = LODS_STRUCT.unpack(raw)
+    if magic != LODS_MAGIC or mtime_ns != source_stat.st_mtime_ns or size != source_stat.st_size:
+        return None
+    if tuple(params) != _lod_params():
+        return None
+    chain = [m]
+    for i in range(1, n_levels + 1):
+        level = read_cache(lod_level_path_for(source_path, i), source_stat)
+        if level is None:
+            return None
+        chain.append(level)
+    return chain
+
+def load_lods_cached(source_path: str, m: mesh_mod.Mesh, use_cache: bool = True):
+    """
+    Cadeia de LODs (lod.build_lod_chain) de 'm', a malha de 'source_path', passando pelo
+    cache: a simplificação só roda quando o .byu muda (ou os parâmetros do lod.py).
+    """
+    if len(m["triangles"]) < lod.BUILD_MIN_TRIANGLES:
+        return lod.build_lod_chain(m)  # só o nível 0, nada a guardar
+    st = os.stat(source_path)
+    if use_cache:
+        chain = read_lods(source_path, st, m)
+        if chain is not None:
+            return chain
+
+    chain = lod.build_lod_chain(m)
+    if use_cache:
+        try:
+            write_lods(source_path, st, chain)
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar cache de LODs de '{source_path}': {e}")
+    return chain
+
+def load_mesh_cached(source_path: str, use_cache: bool = True) -> mesh_mod.Mesh:
+    """
+    Carrega a malha de 'source_path' (.byu) passando pelo cache binário:
+      - cache válido -> abre o arquivo memory-mapped (sem parse de texto)
+      - ausente/inválido -> faz o parse do .byu e regrava o cache
+    Falha ao gravar o cache (pasta sem permissão etc.) não impede o carregamento.
+    """
+    st = os.stat(source_path)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    cache_path = cache_path_for(source_path)
+    if use_cache:
+        cached = read_cache(cache_path, st)
+        if cached is not None:
+            return cached
+
+    verts, tris = byu_loader.load_byu_stream(source_path)
+    m = mesh_mod.make_mesh(verts, tris, name=name)
+    if use_cache:
+        try:
+            write_cache(cache_path, st, m)
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar cache de '{source_path}': {e}")
+    return m
+
+# permite pré-gerar o cache de uma pasta inteira
+if __name__ == "__main__":
+    import sys
+    import glob
+    folder = sys.argv[1] if len(sys.argv) > 1 else "formas"
+    for p in sorted(glob.glob(os.path.join(folder, "*.byu"))):
+        m = load_mesh_cached(p)
+        chain = load_lods_cached(p, m)
+        lods = f" + {len(chain) - 1} LOD(s)" if len(chain) > 1 else ""
+        print(f"{p}: {len(m['vertices'])} vértices, {len(m['triangles'])} triângulos{lods} -> {cache_path_for(p)}")
@@ -0,0 +1,122 @@
+# mesh_loader.py
+# Carregamento de malhas em segundo plano para o visualizador: uma thread trabalhadora
+# (ThreadPoolExecutor) roda a função de carga (parse/cache + dados derivados) fora do laço
+# de eventos, e um cache LRU limitado guarda as malhas prontas (a atual e as vizinhas
+# pré-carregadas). O laço principal só consulta poll() a cada tick.
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+Loader = Dict[str, object]
+
+MAX_CACHED = 4  # malhas mantidas no LRU (a atual + vizinhas)
+
+def new_loader(load_fn: Callable[[str], object], max_cached: int = MAX_CACHED, workers: int = 1) -> Loader:
+    """load_fn(nome) -> valor a guardar (ex.: (malha, LODs)); roda na thread trabalhadora."""
+    return {
+        "load_fn": load_fn,
+        "cache": OrderedDict(),   # nome -> valor, do menos para o mais recentemente usado
+        "max_cached": max(1, max_cached),
+        "pending": {},            # nome -> Future
+        "prefetch": set(),        # nomes pedidos só como pré-carga (podem ser cancelados)
+        "stale": set(),           # cargas em andamento cujo arquivo mudou no meio (refeitas ao terminar)
+        "pool": ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mesh-loader"),
+    }
+
+def _remember(loader: Loader, name: str, value):
+    cache = loader["cache"]
+    cache[name] = value
+    cache.move_to_end(name)
+    while len(cache) > loader["max_cached"]:
+        cache.popitem(last=False)
+
+def cached(loader: Loader, name: str):
+    """Valor já carregado (marcado como usado recentemente) ou None."""
+    cache = loader["cache"]
+    if name in cache:
+        cache.move_to_end(name)
+        return cache[name]
+    return None
+
+def load_now(loader: Loader, name: str):
+    """Carga síncrona (ex.: primeiro objeto, quando ainda não há nada na tela)."""
+    value = cached(loader, name)
+    if value is None:
+        value = loader["load_fn"](name)
+        _remember(loader, name, value)
+    return value
+
+def request(loader: Loader, name: str) -> bool:
+    """
+    Pede a malha em segundo plano. Retorna True se já está no cache (nada a esperar).
+    Pré-cargas que ainda não começaram são canceladas para não atrasar o pedido do usuário.
+    """
+    if cached(loader, name) is not None:
+        return True
+    for other in list(loader["prefetch"]):
+        if other != name and loader["pending"][other].cancel():
+            del loader["pending"][other]
+            loader["prefetch"].discard(other)
+    loader["prefetch"].discard(name)
+    if name not in loader["pending"]:
+        loader["pending"][name] = loader["pool"].submit(loader["load_fn"], name)
+    return False
+
+def prefetch(loader: Loader, names: List[str]):
+    """Agenda a pré-carga dos nomes que não estão no cache nem pendentes."""
+    for name in names:
+        if name in loader["cache"] or name in loader["pending"]:
+            continue
+        loader["pending"][name] = loader["pool"].submit(loader["load_fn"], name)
+        loader["prefetch"].add(name)
+
+def poll(loader: Loader) -> List[Tuple[str, object, Optional[BaseException]]]:
+    """Cargas concluídas desde a última chamada: [(nome, valor, erro)]; as bem-sucedidas vão para o cache."""
+    done = []
+    for name, fut in list(loader["pending"].items()):
+        if not fut.done():
+            continue
+        del loader["pending"][name]
+        if name in loader["stale"]:
+            # arquivo mudou durante a carga: resultado velho é descartado e a carga refeita
+            loader["stale"].discard(name)
+            loader["pending"][name] = loader["pool"].submit(loader["load_fn"], name)
+            continue
+        loader["prefetch"].discard(name)
+        if fut.cancelled():
+            continue
+        err = fut.exception()
+        value = None if err is not None else fut.result()
+        if err is None:
+            _remember(loader, name, value)
+        done.append((name, value, err))
+    return done
+
+def invalidate(loader: Loader, name: str):
+    """Descarta a malha do cache (arquivo mudou); a próxima escolha carrega de novo."""
+    loader["cache"].pop(name, None)
+    fut = loader["pending"].get(name)
+    if fut is None:
+        return
+    if fut.cancel():
+        del loader["pending"][name]
+        loader["prefetch"].discard(name)
+    else:
+        loader["stale"].add(name)
+
+def neighbors(names: List[str], name: str, radius: int = 1) -> List[str]:
+    """Vizinhos de 'name' na lista (mais próximos primeiro), para pré-carga."""
+    if name not in names:
+        return []
+    i = names.index(name)
+    out = []
+    for d in range(1, radius + 1):
+        for j in (i + d, i - d):
+            if 0 <= j < len(names) and names[j] != name:
+                out.append(names[j])
+    return out
+
+def shutdown(loader: Loader):
+    for fut in loader["pending"].values():
+        fut.cancel()
+    loader["pool"].shutdown(wait=True)
@@ -0,0 +1,216 @@
+# parallel_raster.py
+# Rasterização paralela por tiles: a tela é dividida em blocos, os triângulos são
+# distribuídos (binning) pelos tiles que sua caixa projetada toca, e um pool de
+# processos rasteriza cada tile direto num framebuffer em memória compartilhada.
+# Tiles são disjuntos, então não há disputa de escrita; só arrays pequenos de
+# coordenadas trafegam entre processos (nenhum conjunto de pixels é serializado).
+from typing import Dict, Optional, Tuple
+import atexit
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import rasterizer
+
+TILE_SIZE = 128
+
+_pool = None
+_pool_workers = 0
+_shm: Optional[shared_memory.SharedMemory] = None
+
+# ---------- lado do processo principal ----------
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1))
+
+def get_pool(workers: int):
+    """Pool persistente (criado na primeira chamada, recriado se o número de workers mudar)."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        _close_pool()
+        _pool = multiprocessing.get_context().Pool(workers)
+        _pool_workers = workers
+    return _pool
+
+def _shared_block(nbytes: int) -> shared_memory.SharedMemory:
+    """Bloco de memória compartilhada reaproveitado entre frames (realocado só se crescer)."""
+    global _shm
+    if _shm is None or _shm.size < nbytes:
+        if _shm is not None:
+            _shm.close(); _shm.unlink()
+        _shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    return _shm
+
+def _close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.terminate(); _pool.join()
+        _pool = None
+
+def shutdown():
+    """Encerra o pool e libera a memória compartilhada (registrado em atexit)."""
+    global _shm
+    _close_pool()
+    if _shm is not None:
+        _shm.close(); _shm.unlink()
+        _shm = None
+
+atexit.register(shutdown)
+
+def _buffer_views(buf, width: int, height: int, use_zbuffer: bool, with_ids: bool = False):
+    """Cor, profundidade (com z-buffer) e IDs (se pedidos) em sequência no mesmo bloco."""
+    color = np.ndarray((height, width, 3), dtype=np.uint8, buffer=buf)
+    depth = ids = None
+    if use_zbuffer:
+        depth = np.ndarray((height, width), dtype=np.float32, buffer=buf, offset=color.nbytes)
+        if with_ids:
+            ids = np.ndarray((height, width), dtype=np.int32, buffer=buf, offset=color.nbytes + depth.nbytes)
+    return color, depth, ids
+
+def bin_triangles(coords, width: int, height: int, tile_size: int):
+    """
+    Distribui triângulos pelos tiles que a caixa envolvente projetada toca.
+    Retorna lista de (tile_rect (x0,y0,x1,y1), índices dos triângulos).
+    """
+    x0, y0, x1, y1, x2, y2 = (np.asarray(c, dtype=np.float64) for c in coords)
+    n_tx = (width + tile_size - 1) // tile_size
+    n_ty = (height + tile_size - 1) // tile_size
+    bx0 = np.clip(np.ceil(np.minimum(np.minimum(x0, x1), x2)), 0, width - 1).astype(np.int64) // tile_size
+    bx1 = np.clip(np.floor(np.maximum(np.maximum(x0, x1), x2)), 0, width - 1).astype(np.int64) // tile_size
+    by0 = np.clip(np.ceil(np.minimum(np.minimum(y0, y1), y2)), 0, height - 1).astype(np.int64) // tile_size
+    by1 = np.clip(np.floor(np.maximum(np.maximum(y0, y1), y2)), 0, height - 1).astype(np.int64) // tile_size
+    nx = bx1 - bx0 + 1; ny = by1 - by0 + 1
+    per_tri = nx * ny
+    tri = np.repeat(np.arange(len(x0)), per_tri)
+    k = np.arange(per_tri.sum()) - np.repeat(np.cumsum(per_tri) - per_tri, per_tri)
+    tx = bx0[tri] + k % nx[tri]
+    ty = by0[tri] + k // nx[tri]
+    tile = ty * n_tx + tx
+    order = np.argsort(tile, kind="stable")
+    tile = tile[order]; tri = tri[order]
+    cuts = np.flatnonzero(np.diff(tile)) + 1
+    bins = []
+    for t_ids, tris in zip(np.split(tile, cuts), np.split(tri, cuts)):
+        if t_ids.size == 0:
+            continue
+        t = int(t_ids[0])
+        cx0 = (t % n_tx) * tile_size; cy0 = (t // n_tx) * tile_size
+        rect = (cx0, cy0, min(cx0 + tile_size, width), min(cy0 + tile_size, height))
+        bins.append((rect, tris))
+    return bins
+
+def rasterize_mesh_parallel(triangles, proj: Dict[str, np.ndarray],
+                            width: int, height: int,
+                            use_zbuffer: bool = False,
+                            color: Tuple[int, int, int] = (255, 255, 255),
+                            workers: Optional[int] = None,
+                            tile_size: int = TILE_SIZE,
+                            face_colors: Optional[np.ndarray] = None,
+                            vertex_colors: Optional[np.ndarray] = None,
+                            id_buffer: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Mesmas entradas de rasterizer.rasterize_mesh_depth (triângulos + projeção em arrays,
+    cores por face ou por vértice opcionais — estas exigem use_zbuffer=True; id_buffer
+    também, e é preenchido pelos workers na mesma passada).
+    Retorna (color_buffer (height,width,3) uint8, depth_buffer float32 ou None).
+    """
+    workers = workers or default_workers()
+    with_ids = id_buffer is not None
+    if with_ids and not use_zbuffer:
+        raise ValueError("id_buffer exige use_zbuffer=True")
+    ids, t, coords = rasterizer.screen_triangles(triangles, proj)
+    nbytes = width * height * 3 + (width * height * 4 if use_zbuffer else 0) + (width * height * 4 if with_ids else 0)
+    shm = _shared_block(nbytes)
+    color_buf, depth_buf, id_buf = _buffer_views(shm.buf, width, height, use_zbuffer, with_ids)
+    color_buf[:] = 0
+    if use_zbuffer:
+        depth_buf[:] = np.inf
+    if with_ids:
+        id_buf[:] = -1
+
+    if len(t):
+        depth = proj["depth"]
+        tri_depth = np.stack((depth[t[:, 0]], depth[t[:, 1]], depth[t[:, 2]]), axis=1)
+        coords = np.stack(coords, axis=1).astype(np.float64)  # (T,6)
+        # cores vão para os workers por triângulo: (T,3) por face ou (T,3,3) por canto
+        tri_face = np.asarray(face_colors, dtype=np.uint8)[ids] if face_colors is not None else None
+        tri_corner = np.asarray(vertex_colors, dtype=np.float32)[t] if vertex_colors is not None else None
+        keys = rasterizer.tie_keys(triangles, proj, ids)
+        tasks = []
+        for rect, tile in bin_triangles(coords.T, width, height, tile_size):
+            tasks.append((shm.name, width, height, use_zbuffer, color, rect,
+                          coords[tile], tri_depth[tile] if use_zbuffer else None, keys[tile],
+                          tri_face[tile] if tri_face is not None else None,
+                          tri_corner[tile] if tri_corner is not None else None,
+                          ids[tile] if with_ids else None))
+        get_pool(workers).map(_rasterize_tile, tasks)
+
+    out_color = color_buf.copy()
+    out_depth = depth_buf.copy() if use_zbuffer else None
+    if with_ids:
+        id_buffer[:] = id_buf
+    del color_buf, depth_buf, id_buf
+    return out_color, out_depth
+
+# ---------- lado do worker ----------
+
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+_owners: Dict[Tuple[int, int], np.ndarray] = {}   # buffer de donos (desempate) por tamanho de frame
+
+def _owner_buffer(width: int, height: int, rect) -> np.ndarray:
+    """Buffer de donos do processo, limpo só no retângulo do tile (tiles não se sobrepõem)."""
+    owner = _owners.get((width, height))
+    if owner is None:
+        _owners.clear()
+        owner = _owners[(width, height)] = rasterizer.new_owner_buffer(width, height)
+    x0, y0, x1, y1 = rect
+    owner[y0:y1, x0:x1] = rasterizer.NO_OWNER
+    return owner
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        # o bloco pertence ao processo principal (os workers compartilham o mesmo
+        # resource_tracker, então anexar aqui não cria um segundo dono)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python >= 3.13
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        _attached[name] = shm
+    return shm
+
+def _rasterize_tile(task):
+    name, width, height, use_zbuffer, color, rect, coords, tri_depth, keys, face_colors, corner_colors, tri_ids = task
+    shm = _attach(name)
+    color_buf, depth_buf, id_buf = _buffer_views(shm.buf, width, height, use_zbuffer, tri_ids is not None)
+    cols = [coords[:, i] for i in range(6)]
+    # cada canto vira um "vértice" próprio: profundidade e cores usam as mesmas funções
+    # do rasterizador serial (rasterizer.fragment_depth / interpolate_vertex_colors)
+    corners = np.arange(3 * len(coords)).reshape(-1, 3)
+    if use_zbuffer:
+        corner_depth = tri_depth.reshape(-1)
+        owner = _owner_buffer(width, height, rect)
+    if corner_colors is not None:
+        corner_colors = corner_colors.reshape(-1, 3)
+    for tri, xs, ys, w0, w1, w2 in rasterizer.triangle_fragments(*cols, width, height, clip=rect):
+        if use_zbuffer:
+            z = rasterizer.fragment_depth(corners, corner_depth, tri, w0, w1, w2)
+            win = rasterizer.depth_test(depth_buf, xs, ys, z, keys[tri], owner)
+            xs = xs[win]; ys = ys[win]
+            tri = tri[win]; w0 = w0[win]; w1 = w1[win]; w2 = w2[win]
+        if corner_colors is not None:
+            color_buf[ys, xs] = rasterizer.interpolate_vertex_colors(corners, corner_depth, corner_colors,
+                                                                      tri, w0, w1, w2)
+        elif face_colors is not None:
+            color_buf[ys, xs] = face_colors[tri]
+        else:
+            color_buf[ys, xs] = color
+        if tri_ids is not None:
+            id_buf[ys, xs] = tri_ids[tri]
+    del color_buf, depth_buf, id_buf
+    return len(coords)
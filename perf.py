@@ -0,0 +1,123 @@
+# perf.py
+# Instrumentação leve do pipeline: tempos por estágio, contadores por frame, FPS
+# móvel e, opcionalmente, um arquivo de trace (formato Trace Event do Chrome,
+# abrir em chrome://tracing ou ui.perfetto.dev).
+# Desligado (stats = None nos chamadores), nada disso roda: os pontos de medição
+# usam stage(None, ...), que devolve um contexto nulo pré-alocado.
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, Optional
+import json
+import os
+import time
+
+Stats = Dict[str, object]
+
+_NULL = nullcontext()
+FPS_WINDOW = 60  # frames na média móvel
+
+def new_stats(trace_path: Optional[str] = None) -> Stats:
+    stats = {
+        "stages": {},                         # nome -> ms do frame atual
+        "counters": {},                       # nome -> valor do frame atual
+        "last_stages": {},                    # último frame completo (para o HUD)
+        "last_counters": {},
+        "frame_ms": deque(maxlen=FPS_WINDOW), # intervalo entre frames desenhados
+        "last_frame_t": None,
+        "frames": 0,
+        "t0": time.perf_counter(),
+        "trace": None,
+    }
+    if trace_path:
+        f = open(trace_path, "w", encoding="utf-8")
+        f.write("[\n")
+        stats["trace"] = f
+        stats["trace_path"] = trace_path
+    return stats
+
+class _Stage:
+    __slots__ = ("stats", "name", "t")
+
+    def __init__(self, stats: Stats, name: str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter()
+        ms = (t1 - self.t) * 1000.0
+        stages = self.stats["stages"]
+        stages[self.name] = stages.get(self.name, 0.0) + ms
+        trace = self.stats["trace"]
+        if trace is not None:
+            ts = (self.t - self.stats["t0"]) * 1e6
+            trace.write(json.dumps({"name": self.name, "ph": "X", "ts": round(ts, 1),
+                                    "dur": round(ms * 1000.0, 1), "pid": os.getpid(), "tid": 1}) + ",\n")
+        return False
+
+def stage(stats: Optional[Stats], name: str):
+    """Contexto que mede o estágio 'name'; com stats None não faz nada."""
+    if stats is None:
+        return _NULL
+    return _Stage(stats, name)
+
+def count(stats: Optional[Stats], name: str, value: int):
+    if stats is None:
+        return
+    counters = stats["counters"]
+    counters[name] = counters.get(name, 0) + int(value)
+
+def frame_done(stats: Optional[Stats]):
+    """Fecha o frame: atualiza FPS móvel, guarda os valores para o HUD e emite contadores no trace."""
+    if stats is None:
+        return
+    now = time.perf_counter()
+    if stats["last_frame_t"] is not None:
+        stats["frame_ms"].append((now - stats["last_frame_t"]) * 1000.0)
+    stats["last_frame_t"] = now
+    stats["frames"] += 1
+    stats["last_stages"] = stats["stages"]
+    stats["stages"] = {}
+    counters = stats["counters"]
+    stats["counters"] = {}
+    if not counters:
+        # frame só de sobreposição/UI: mantém os contadores da última geometria desenhada
+        return
+    stats["last_counters"] = counters
+    trace = stats["trace"]
+    if trace is not None:
+        ts = (now - stats["t0"]) * 1e6
+        trace.write(json.dumps({"name": "contadores", "ph": "C", "ts": round(ts, 1),
+                                "pid": os.getpid(), "args": stats["last_counters"]}) + ",\n")
+
+def fps(stats: Stats) -> float:
+    frame_ms = stats["frame_ms"]
+    if not frame_ms:
+        return 0.0
+    return 1000.0 * len(frame_ms) / sum(frame_ms)
+
+def hud_lines(stats: Stats):
+    lines = [f"FPS (média {len(stats['frame_ms'])}): {fps(stats):5.1f}"]
+    total = 0.0
+    for name, ms in stats["last_stages"].items():
+        lines.append(f"{name:>10s}: {ms:7.2f} ms")
+        total += ms
+    if stats["last_stages"]:
+        lines.append(f"{'total':>10s}: {total:7.2f} ms")
+    for name, value in stats["last_counters"].items():
+        lines.append(f"{name}: {value}")
+    return lines
+
+def close(stats: Optional[Stats]):
+    """Finaliza o arquivo de trace (se houver)."""
+    if stats is None or stats["trace"] is None:
+        return
+    f = stats["trace"]
+    f.write(json.dumps({"name": "fim", "ph": "i", "ts": round((time.perf_counter() - stats["t0"]) * 1e6, 1),
+                        "pid": os.getpid(), "s": "g"}) + "\n]\n")
+    f.close()
+    stats["trace"] = None
+    print(f"Trace gravado em {stats['trace_path']}")
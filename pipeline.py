@@ -0,0 +1,170 @@
+# pipeline.py
+# Pipeline de renderização sem dependência de janela/pygame: malha + câmera -> framebuffer.
+# Usado pelo visualizador interativo (main.py) e pelos modos sem janela (batch_render.py).
+import numpy as np
+
+import bvh
+import mesh as mesh_mod
+import transform
+import projection
+import rasterizer
+import parallel_raster
+import perf
+
+FILL_COLOR = (255, 255, 255)
+
+# Sombreamento: luz direcional presa à câmera (direção para a luz em coordenadas de vista:
+# acima, à esquerda e do lado do observador) + termo ambiente. Iluminação dos dois lados
+# (|n·l|), já que malhas abertas mostram o verso das faces.
+SHADING_MODES = ("none", "flat", "gouraud")
+LIGHT_DIR = (-0.4, 0.5, -1.0)
+AMBIENT = 0.15
+
+def lambert(normals_view, light_dir=LIGHT_DIR, ambient=AMBIENT) -> np.ndarray:
+    """Intensidade (K,) em [ambient, 1] para normais em coordenadas de vista (normal nula -> ambiente)."""
+    l = np.asarray(light_dir, dtype=np.float64)
+    l = l / np.linalg.norm(l)
+    return ambient + (1.0 - ambient) * np.abs(np.asarray(normals_view, dtype=np.float64) @ l)
+
+def shade_colors(normals_view, color=FILL_COLOR) -> np.ndarray:
+    """Cores (K,3) float32 em [0,255]: FILL_COLOR modulada pela intensidade de lambert."""
+    return (lambert(normals_view)[:, None] * np.asarray(color, dtype=np.float64)).astype(np.float32)
+
+def shading_colors(mesh, cam, proj_results, tri_idx, shading):
+    """
+    (face_colors, vertex_colors) para rasterize_frame conforme o modo: 'flat' usa as normais
+    por face dos triângulos do frame (tri_idx), 'gouraud' as normais por vértice dos vértices
+    projetados (proj['vertex_ids']); 'none' -> (None, None).
+    """
+    if shading == "none":
+        return None, None
+    if shading not in SHADING_MODES:
+        raise ValueError(f"Sombreamento desconhecido: {shading} (use {', '.join(SHADING_MODES)})")
+    R = transform.compute_camera_basis(cam)["M"][:3, :3]   # mundo -> vista (só rotação)
+    if shading == "flat":
+        return np.rint(shade_colors(mesh["face_normals"][tri_idx] @ R.T)).astype(np.uint8), None
+    return None, shade_colors(mesh["vertex_normals"][proj_results["vertex_ids"]] @ R.T)
+
+def cull_and_project(mesh, cam, width, height, cull_backfaces=False, stats=None):
+    """
+    Culling (BVH contra o frustum e, opcionalmente, faces de costas) seguido de
+    transformação/projeção só dos vértices usados pelos triângulos restantes.
+    Retorna (projeção em arrays, triângulos do frame com índices compactados,
+    índices dos triângulos originais).
+    """
+    verts, tris = mesh["vertices"], mesh["triangles"]
+    with perf.stage(stats, "culling"):
+        basis = transform.compute_camera_basis(cam)
+        tri_idx = bvh.frustum_cull(mesh["bvh"], basis, cam)
+        if cull_backfaces:
+            tri_idx = tri_idx[~mesh_mod.backfacing(mesh, basis["C"], tri_idx)]
+        sub_tris = tris[tri_idx]
+        valid = ((sub_tris >= 0) & (sub_tris < len(verts))).all(axis=1)
+        tri_idx = tri_idx[valid]
+        used, local = np.unique(sub_tris[valid], return_inverse=True)
+        frame_tris = local.reshape(-1, 3)
+    with perf.stage(stats, "projeção"):
+        view_coords = transform.world_to_view_array(verts[used], basis)
+        proj_results = projection.world_view_to_screen_arrays(view_coords, cam, width, height)
+    # ligação com a malha: vértice compactado -> vértice original (ordenado) e
+    # triângulo do frame -> triângulo original (usados pelas sobreposições)
+    proj_results["vertex_ids"] = used
+    proj_results["triangle_ids"] = tri_idx
+    if stats is not None:
+        perf.count(stats, "triângulos", len(tris))
+        perf.count(stats, "descartados (culling)", len(tris) - len(frame_tris))
+        perf.count(stats, "vértices projetados", len(used))
+    return proj_results, frame_tris, tri_idx
+
+def render_frame(mesh, cam, width, height, use_zbuffer=False, cull_backfaces=False, parallel=False,
+                 shading="none", stats=None, picking=None):
+    """
+    Pipeline de um frame. Antes de qualquer transformação, a BVH da malha descarta
+    grupos de triângulos fora do frustum; só os vértices usados pelos triângulos
+    restantes são transformados e projetados.
+    Retorna (framebuffer RGB height x width x 3, projeção, triângulos do frame) — os índices
+    dos triângulos do frame referem-se aos arrays da projeção (vértices compactados).
+    Com use_zbuffer=True rasteriza com teste de profundidade (rasterizer.rasterize_mesh_depth).
+    Com cull_backfaces=True descarta as faces de costas para a câmera (normais pré-calculadas
+    da malha) antes da conversão por varredura — só é correto em malhas fechadas.
+    Com parallel=True a rasterização é feita por tiles num pool de processos
+    (parallel_raster), escrevendo num framebuffer em memória compartilhada.
+    shading ('none', 'flat' ou 'gouraud') ilumina a malha com LIGHT_DIR; sombreado sempre
+    usa z-buffer.
+    stats (perf.new_stats) recebe tempos por estágio e contadores; None = sem instrumentação.
+    picking (dict): ver rasterize_frame.
+    """
+    proj_results, frame_tris, tri_idx = cull_and_project(mesh, cam, width, height, cull_backfaces, stats)
+    with perf.stage(stats, "sombreamento"):
+        face_colors, vertex_colors = shading_colors(mesh, cam, proj_results, tri_idx, shading)
+    with perf.stage(stats, "raster"):
+        framebuffer = rasterize_frame(frame_tris, proj_results, width, height, use_zbuffer, parallel,
+                                      face_colors, vertex_colors, picking)
+    if stats is not None:
+        perf.count(stats, "triângulos rasterizados",
+                   np.count_nonzero(rasterizer.drawable_triangles(rasterizer.triangles_array(frame_tris), proj_results)))
+        perf.count(stats, "pixels escritos", np.count_nonzero(framebuffer.any(axis=2)))
+    return framebuffer, proj_results, frame_tris
+
+def rasterize_frame(frame_tris, proj_results, width, height, use_zbuffer=False, parallel=False,
+                    face_colors=None, vertex_colors=None, picking=None):
+    """
+    Rasteriza triângulos já projetados num framebuffer RGB com FILL_COLOR (mesmos modos de
+    render_frame), ou com as cores de shading_colors — nesse caso sempre com z-buffer, senão
+    a cor de cada pixel dependeria da ordem dos triângulos.
+    picking (dict), se dado, recebe 'ids' e 'depth' — os buffers de seleção (ver pick) —
+    preenchidos nesta mesma passada quando ela usa z-buffer; sem z-buffer não há vencedor
+    por pixel, o dict fica vazio e a seleção precisa de pick_buffers.
+    """
+    if face_colors is not None or vertex_colors is not None:
+        use_zbuffer = True
+    id_buffer = rasterizer.new_id_buffer(width, height) if picking is not None and use_zbuffer else None
+    if parallel:
+        framebuffer, depth_buffer = parallel_raster.rasterize_mesh_parallel(
+            frame_tris, proj_results, width, height, use_zbuffer, color=FILL_COLOR,
+            face_colors=face_colors, vertex_colors=vertex_colors, id_buffer=id_buffer)
+    elif use_zbuffer:
+        framebuffer, depth_buffer = rasterizer.rasterize_mesh_depth(
+            frame_tris, proj_results, width, height, color=FILL_COLOR,
+            face_colors=face_colors, vertex_colors=vertex_colors, id_buffer=id_buffer)
+    else:
+        coverage = rasterizer.rasterize_mesh_coverage(frame_tris, proj_results, width, height)
+        framebuffer = np.zeros((height, width, 3), dtype=np.uint8)
+        framebuffer[coverage != 0] = FILL_COLOR
+    if id_buffer is not None:
+        picking.update(ids=id_buffer, depth=depth_buffer)
+    return framebuffer
+
+def pick_buffers(frame_tris, proj_results, width, height):
+    """
+    Buffers de seleção do frame: (id_buffer int32 com o índice em frame_tris do triângulo
+    visível em cada pixel, -1 no fundo; depth_buffer float32 com Zv). É uma passada extra
+    de z-buffer, só para frames desenhados sem z-buffer (os demais já trazem os buffers via
+    rasterize_frame(picking=...)); depois disso cada consulta (pick) é O(1).
+    """
+    id_buffer = rasterizer.new_id_buffer(width, height)
+    _, depth_buffer = rasterizer.rasterize_mesh_depth(frame_tris, proj_results, width, height,
+                                                      id_buffer=id_buffer)
+    return id_buffer, depth_buffer
+
+def pick(id_buffer, depth_buffer, cam, x, y):
+    """
+    Consulta o pixel (x, y) dos buffers de pick_buffers. Retorna None (fundo ou fora da tela)
+    ou dict com 'triangle' (índice em frame_tris), 'depth' (Zv), 'view' e 'world' — o ponto
+    é reconstruído desfazendo a projeção do pixel na profundidade do z-buffer.
+    """
+    height, width = id_buffer.shape
+    if not (0 <= x < width and 0 <= y < height) or id_buffer[y, x] < 0:
+        return None
+    zv = float(depth_buffer[y, x])
+    d = float(cam.get("d", 1.0))
+    # inverso do mapeamento de projection.world_view_to_screen_arrays (pixel -> ndc -> vista)
+    x_ndc = 2.0 * x / width - 1.0
+    y_ndc = 1.0 - 2.0 * y / height
+    view = np.array([x_ndc * float(cam.get("hx", 1.0)) * zv / d,
+                     y_ndc * float(cam.get("hy", 1.0)) * zv / d,
+                     zv])
+    M = transform.compute_camera_basis(cam)["M"]
+    world = M[:3, :3].T @ (view - M[:3, 3])
+    return {"triangle": int(id_buffer[y, x]), "depth": zv,
+            "view": tuple(view.tolist()), "world": tuple(world.tolist())}
@@ -2,8 +2,12 @@
 from typing import Tuple, List, Dict, Optional
 import math
 
+import numpy as np
+
 Vec3 = Tuple[float, float, float]
 ScreenPt = Tuple[Optional[float], Optional[float], Optional[int]]  # (x_s, y_s, valid_flag)
+# Projeção em "struct of arrays": dict de arrays paralelos, um elemento por vértice
+ProjArrays = Dict[str, np.ndarray]
 
 def project_perspective(point_view: Vec3, d: float) -> Tuple[Optional[float], Optional[float]]:
     """
@@ -85,4 +89,51 @@ def world_view_to_screen_list(view_vertices: List[Vec3], camera_params: Dict[str
         px, py = ndc_to_screen(x_ndc, y_ndc, width, height)
         item["pixel"] = (px, py)
         results.append(item)
-    return results
\ No newline at end of file
+    return results
+
+def world_view_to_screen_arrays(view_vertices, camera_params: Dict[str, float], width: int, height: int) -> ProjArrays:
+    """
+    Mesmo pipeline de world_view_to_screen_list, vetorizado para a malha inteira.
+    Recebe (N,3) em coordenadas de vista e retorna dict de arrays paralelos (tamanho N):
+      'view'        : float64 (N,3)  coordenadas de vista
+      'depth'       : float64 (N,)   Zv (profundidade em vista)
+      'x_s', 'y_s'  : float64 (N,)   plano de projeção (NaN se não projetável)
+      'x_ndc','y_ndc': float64 (N,)  coordenadas normalizadas (NaN se não projetável)
+      'px', 'py'    : int32 (N,)     pixel (i,j) com clamp em [-1,1] (0 se não projetável)
+      'projectable' : bool (N,)      Zv > 0
+      'visible'     : bool (N,)      projetável e dentro de [-1,1] x [-1,1]
+    """
+    d = float(camera_params.get("d", 1.0))
+    hx = float(camera_params.get("hx", 1.0))
+    hy = float(camera_params.get("hy", 1.0))
+
+    view = np.asarray(view_vertices, dtype=np.float64).reshape(-1, 3)
+    Xv = view[:, 0]; Yv = view[:, 1]; Zv = view[:, 2]
+    projectable = Zv > 0.0
+    if (hx == 0 or hy == 0) and projectable.any():
+        raise ValueError("hx e hy devem ser diferentes de 0")
+
+    # pontos não projetáveis viram NaN sem gerar avisos de divisão
+    safe_z = np.where(projectable, Zv, np.nan)
+    x_s = d * (Xv / safe_z)
+    y_s = d * (Yv / safe_z)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_ndc = x_s / hx
+        y_ndc = y_s / hy
+
+    visible = projectable & (np.abs(x_ndc) <= 1.0) & (np.abs(y_ndc) <= 1.0)
+
+    # ndc -> tela (clamp em [-1,1], j de cima para baixo), igual a ndc_to_screen
+    cx = np.clip(np.where(projectable, x_ndc, 0.0), -1.0, 1.0)
+    cy = np.clip(np.where(projectable, y_ndc, 0.0), -1.0, 1.0)
+    px = np.rint((cx + 1.0) / 2.0 * width).astype(np.int32)
+    py = np.rint((1.0 - cy) / 2.0 * height).astype(np.int32)
+    px[~projectable] = 0
+    py[~projectable] = 0
+
+    return {
+        "view": view, "depth": Zv,
+        "x_s": x_s, "y_s": y_s, "x_ndc": x_ndc, "y_ndc": y_ndc,
+        "px": px, "py": py,
+        "projectable": projectable, "visible": visible,
+    }
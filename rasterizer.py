@@ -1,78 +1,307 @@
 # rasterizer.py
-from typing import Tuple, Set, List, Dict
-import math
+from typing import Tuple, List, Dict
+
+import numpy as np
 
 Pixel = Tuple[int, int]
 Vec2f = Tuple[float, float]
 
-def _edge_intersection_x(y: int, x0: float, y0: float, x1: float, y1: float) -> float:
-    t = (y - y0) / (y1 - y0)
-    return x0 + t * (x1 - x0)
+def triangles_array(triangles) -> np.ndarray:
+    """Índices de triângulos como array int64 (M,3) (aceita lista de tuplas ou array)."""
+    return np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
 
-def rasterize_triangle_pixels(p0: Tuple[float,int], p1: Tuple[float,int], p2: Tuple[float,int],
-                              width: int, height: int) -> Set[Pixel]:
-    verts = [(float(p0[0]), float(p0[1])),
-             (float(p1[0]), float(p1[1])),
-             (float(p2[0]), float(p2[1]))]
+def drawable_triangles(tris: np.ndarray, proj: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Máscara (M,) dos triângulos desenháveis: índices válidos e os 3 vértices
+    projetáveis e visíveis (mesma simplificação do pipeline original).
+    """
+    n = len(proj["visible"])
+    ok = ((tris >= 0) & (tris < n)).all(axis=1)
+    safe = np.where(ok[:, None], tris, 0)
+    return ok & proj["visible"][safe].all(axis=1)
 
-    ys = [v[1] for v in verts]
+# --- rasterização vetorizada por funções de aresta ---
 
-    min_y = math.ceil(max(min(ys), 0))
-    max_y = math.floor(min(max(ys), height - 1))
+# limite de amostras (pixels candidatos) avaliadas por lote de triângulos
+FRAGMENT_BATCH_SAMPLES = 1 << 20
 
-    pixels = set()
-    edges = [ (verts[0], verts[1]), (verts[1], verts[2]), (verts[2], verts[0]) ]
+def _pow2_ceil(v: np.ndarray) -> np.ndarray:
+    return np.left_shift(1, np.ceil(np.log2(np.maximum(v, 1))).astype(np.int64))
 
-    for y in range(min_y, max_y + 1):
-        inter_xs: List[float] = []
-        for (xa, ya), (xb, yb) in edges:
-            if abs(yb - ya) < 1e-9:
-                continue
-            ymin = min(ya, yb)
-            ymax = max(ya, yb)
-            # incluindo limites de forma consistente
-            if y >= math.ceil(ymin) and y <= math.floor(ymax):
-                x_int = _edge_intersection_x(y, xa, ya, xb, yb)
-                inter_xs.append(x_int)
-        if not inter_xs:
-            continue
-        inter_xs.sort()
-        if len(inter_xs) % 2 != 0:
-            inter_xs = inter_xs[:-1]
-            if not inter_xs:
-                continue
-        for i in range(0, len(inter_xs), 2):
-            x_left = inter_xs[i]
-            x_right = inter_xs[i+1]
-            x_start = math.ceil(min(x_left, x_right))
-            x_end = math.floor(max(x_left, x_right))
-            if x_end < 0 or x_start > width - 1:
+def triangle_fragments(x0, y0, x1, y1, x2, y2, width: int, height: int,
+                       clip: Tuple[int, int, int, int] = None,
+                       batch_samples: int = FRAGMENT_BATCH_SAMPLES):
+    """
+    Conversão por varredura vetorizada: para cada triângulo (vértices em pixels, arrays (T,)),
+    avalia as 3 funções de aresta em todos os pixels inteiros da caixa envolvente.
+    Triângulos são agrupados por tamanho da caixa (potências de 2 em x e y) e processados
+    em lotes de até 'batch_samples' amostras, então não há laço Python por pixel.
+    Borda inclusiva (amostras sobre a aresta entram), como a varredura original.
+    clip = (x_ini, y_ini, x_fim, y_fim) restringe a região (fim exclusivo); padrão = tela.
+    Gera tuplas (tri, xs, ys, w0, w1, w2): índice do triângulo (na entrada), pixel e
+    pesos baricêntricos (float64) de cada fragmento coberto.
+    """
+    x0 = np.asarray(x0, dtype=np.float64); y0 = np.asarray(y0, dtype=np.float64)
+    x1 = np.asarray(x1, dtype=np.float64); y1 = np.asarray(y1, dtype=np.float64)
+    x2 = np.asarray(x2, dtype=np.float64); y2 = np.asarray(y2, dtype=np.float64)
+    cx0, cy0, cx1, cy1 = clip if clip is not None else (0, 0, width, height)
+
+    bx0 = np.maximum(np.ceil(np.minimum(np.minimum(x0, x1), x2)), cx0).astype(np.int64)
+    bx1 = np.minimum(np.floor(np.maximum(np.maximum(x0, x1), x2)), cx1 - 1).astype(np.int64)
+    by0 = np.maximum(np.ceil(np.minimum(np.minimum(y0, y1), y2)), cy0).astype(np.int64)
+    by1 = np.minimum(np.floor(np.maximum(np.maximum(y0, y1), y2)), cy1 - 1).astype(np.int64)
+    bw = bx1 - bx0 + 1
+    bh = by1 - by0 + 1
+
+    # área assinada (2x); orientação é normalizada para que "dentro" seja >= 0
+    area = (x1 - x0) * (y2 - y0) - (y1 - y0) * (x2 - x0)
+    # triângulo degenerado totalmente horizontal não gera pixels (como na varredura)
+    flat = (y0 == y1) & (y1 == y2)
+    live = np.flatnonzero((bw > 0) & (bh > 0) & ~flat)
+    if live.size == 0:
+        return
+    sign = np.where(area < 0, -1.0, 1.0)
+    inv_area = np.where(area != 0, 1.0 / np.where(area != 0, area, 1.0), 0.0)
+
+    sx = _pow2_ceil(bw[live]); sy = _pow2_ceil(bh[live])
+    key = sx * 4096 + sy
+    order = live[np.argsort(key, kind="stable")]
+    key_sorted = np.sort(key, kind="stable")
+    bounds = np.flatnonzero(np.diff(key_sorted)) + 1
+    for group in np.split(order, bounds):
+        gx = int(_pow2_ceil(bw[group[:1]])[0]); gy = int(_pow2_ceil(bh[group[:1]])[0])
+        per_batch = max(1, batch_samples // (gx * gy))
+        ox = np.arange(gx, dtype=np.int64)[None, None, :]
+        oy = np.arange(gy, dtype=np.int64)[None, :, None]
+        for s in range(0, len(group), per_batch):
+            t = group[s:s + per_batch]
+            X = bx0[t][:, None, None] + ox
+            Y = by0[t][:, None, None] + oy
+            ax = x0[t][:, None, None]; ay = y0[t][:, None, None]
+            bxv = x1[t][:, None, None]; byv = y1[t][:, None, None]
+            cxv = x2[t][:, None, None]; cyv = y2[t][:, None, None]
+            sg = sign[t][:, None, None]
+            e12 = ((cxv - bxv) * (Y - byv) - (cyv - byv) * (X - bxv)) * sg
+            e20 = ((ax - cxv) * (Y - cyv) - (ay - cyv) * (X - cxv)) * sg
+            e01 = ((bxv - ax) * (Y - ay) - (byv - ay) * (X - ax)) * sg
+            inside = ((X <= bx1[t][:, None, None]) & (Y <= by1[t][:, None, None])
+                      & (e12 >= 0) & (e20 >= 0) & (e01 >= 0))
+            ti, jj, ii = np.nonzero(inside)
+            if ti.size == 0:
                 continue
-            x_start = max(x_start, 0)
-            x_end = min(x_end, width - 1)
-            for x in range(x_start, x_end + 1):
-                pixels.add((x, y))
-    return pixels
+            tri = t[ti]
+            xs = bx0[tri] + ii
+            ys = by0[tri] + jj
+            inv = (inv_area[tri] * sign[tri])
+            w0 = e12[ti, jj, ii] * inv
+            w1 = e20[ti, jj, ii] * inv
+            w2 = e01[ti, jj, ii] * inv
+            degenerate = area[tri] == 0
+            if degenerate.any():
+                w0[degenerate] = w1[degenerate] = w2[degenerate] = 1.0 / 3.0
+            yield tri, xs, ys, w0, w1, w2
+
+def tie_keys(triangles, proj: Dict[str, np.ndarray], ids: np.ndarray) -> np.ndarray:
+    """
+    Chave de desempate (int32) dos triângulos 'ids' de 'triangles': o triângulo de origem
+    (proj['triangle_ids'], da projeção do pipeline) quando houver, senão o próprio índice —
+    assim o resultado também não depende da ordem em que os triângulos chegam.
+    """
+    src = proj.get("triangle_ids")
+    if src is not None and len(src) == len(triangles_array(triangles)):
+        return np.asarray(src)[ids].astype(np.int32)
+    return ids.astype(np.int32)
+
+def screen_triangles(triangles, proj: Dict[str, np.ndarray]):
+    """Triângulos desenháveis e as coordenadas de pixel de seus vértices (arrays (T,))."""
+    tris = triangles_array(triangles)
+    ids = np.flatnonzero(drawable_triangles(tris, proj))
+    t = tris[ids]
+    px = proj["px"]; py = proj["py"]
+    return ids, t, (px[t[:, 0]], py[t[:, 0]], px[t[:, 1]], py[t[:, 1]], px[t[:, 2]], py[t[:, 2]])
+
+def rasterize_mesh_coverage(triangles, proj: Dict[str, np.ndarray],
+                            width: int, height: int,
+                            framebuffer: np.ndarray = None, value: int = 1) -> np.ndarray:
+    """
+    Rasteriza a malha direto num framebuffer (height x width, uint8): pixels cobertos
+    recebem 'value'. Nenhum objeto Python por pixel é criado.
+    """
+    if framebuffer is None:
+        framebuffer = np.zeros((height, width), dtype=np.uint8)
+    _, _, coords = screen_triangles(triangles, proj)
+    for _, xs, ys, _, _, _ in triangle_fragments(*coords, width, height):
+        framebuffer[ys, xs] = value
+    return framebuffer
+
+def new_depth_buffer(width: int, height: int) -> np.ndarray:
+    """Z-buffer float32 (height x width) iniciado em +inf (nada desenhado)."""
+    return np.full((height, width), np.inf, dtype=np.float32)
+
+def new_id_buffer(width: int, height: int) -> np.ndarray:
+    """Buffer de IDs de triângulo int32 (height x width) iniciado em -1 (fundo)."""
+    return np.full((height, width), -1, dtype=np.int32)
+
+def fragment_depth(tri_verts: np.ndarray, depth: np.ndarray, tri, w0, w1, w2) -> np.ndarray:
+    """
+    Profundidade de vista (Zv) nos fragmentos, com correção de perspectiva:
+    1/z é linear no espaço de tela, então interpola-se 1/z pelos pesos baricêntricos.
+    """
+    t = tri_verts[tri]
+    inv_z = w0 / depth[t[:, 0]] + w1 / depth[t[:, 1]] + w2 / depth[t[:, 2]]
+    return (1.0 / inv_z).astype(np.float32)
+
+NO_OWNER = np.iinfo(np.int32).max  # buffer de donos: pixel ainda sem triângulo vencedor
+
+def new_owner_buffer(width: int, height: int) -> np.ndarray:
+    """Buffer int32 (height x width) do triângulo dono de cada pixel, para desempate em depth_test."""
+    return np.full((height, width), NO_OWNER, dtype=np.int32)
+
+def depth_test(depth_buffer: np.ndarray, xs: np.ndarray, ys: np.ndarray, z: np.ndarray,
+               tri_ids: np.ndarray = None, owner: np.ndarray = None) -> np.ndarray:
+    """
+    Teste de profundidade de um lote de fragmentos (vetorizado, vários fragmentos podem cair
+    no mesmo pixel): atualiza o z-buffer com o mínimo por pixel e retorna a máscara dos
+    fragmentos vencedores (os que ficaram com a menor profundidade no pixel).
+    Com tri_ids (ID de triângulo de cada fragmento) e owner (new_owner_buffer), empates de
+    profundidade — pixels sobre arestas compartilhadas — ficam com o menor ID, também contra
+    lotes anteriores: o vencedor não depende da ordem dos lotes nem dos tiles.
+    """
+    width = depth_buffer.shape[1]
+    flat = depth_buffer.reshape(-1)
+    idx = ys * width + xs
+    if owner is None:
+        np.minimum.at(flat, idx, z)
+        return z <= flat[idx]
+    before = flat[idx]
+    np.minimum.at(flat, idx, z)
+    best = flat[idx]
+    win = z <= best
+    own = owner.reshape(-1)
+    own[idx[before > best]] = NO_OWNER   # profundidade melhorou: o dono anterior perde
+    np.minimum.at(own, idx[win], tri_ids[win])
+    return win & (own[idx] == tri_ids)
+
+def interpolate_vertex_colors(tri_verts: np.ndarray, depth: np.ndarray, vertex_colors: np.ndarray,
+                              tri, w0, w1, w2) -> np.ndarray:
+    """
+    Cor (K,3) uint8 nos fragmentos, interpolando as cores dos vértices (Gouraud) com
+    correção de perspectiva: pesos baricêntricos divididos pela profundidade de cada vértice.
+    """
+    t = tri_verts[tri]
+    a0 = w0 / depth[t[:, 0]]; a1 = w1 / depth[t[:, 1]]; a2 = w2 / depth[t[:, 2]]
+    s = a0 + a1 + a2
+    c = (vertex_colors[t[:, 0]] * (a0 / s)[:, None]
+         + vertex_colors[t[:, 1]] * (a1 / s)[:, None]
+         + vertex_colors[t[:, 2]] * (a2 / s)[:, None])
+    return np.clip(c + 0.5, 0.0, 255.0).astype(np.uint8)
+
+def rasterize_mesh_depth(triangles, proj: Dict[str, np.ndarray],
+                         width: int, height: int,
+                         color_buffer: np.ndarray = None,
+                         depth_buffer: np.ndarray = None,
+                         color: Tuple[int, int, int] = (255, 255, 255),
+                         face_colors: np.ndarray = None,
+                         vertex_colors: np.ndarray = None,
+                         id_buffer: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Modo com z-buffer (remoção de superfícies ocultas): rasteriza em lotes vetorizados,
+    interpolando a profundidade de vista de proj['depth'] e mantendo, em cada pixel, o
+    fragmento mais próximo da câmera (empates: ver depth_test e tie_keys).
+    Cor dos fragmentos: 'color' fixa; face_colors (M,3) uint8, uma por triângulo de
+    'triangles' (sombreamento flat); ou vertex_colors (N,3) float, uma por vértice da
+    projeção, interpoladas nos fragmentos (Gouraud).
+    id_buffer (int32 height x width, ver new_id_buffer), se dado, recebe junto com a cor o
+    índice em 'triangles' do triângulo visível em cada pixel (seleção por clique).
+    Retorna (color_buffer (height,width,3) uint8, depth_buffer (height,width) float32).
+    """
+    if color_buffer is None:
+        color_buffer = np.zeros((height, width, 3), dtype=np.uint8)
+    if depth_buffer is None:
+        depth_buffer = new_depth_buffer(width, height)
+    ids, t, coords = screen_triangles(triangles, proj)
+    depth = proj["depth"]
+    owner = new_owner_buffer(width, height)
+    keys = tie_keys(triangles, proj, ids)
+    if face_colors is not None:
+        face_colors = np.asarray(face_colors, dtype=np.uint8)[ids]
+    for tri, xs, ys, w0, w1, w2 in triangle_fragments(*coords, width, height):
+        z = fragment_depth(t, depth, tri, w0, w1, w2)
+        win = depth_test(depth_buffer, xs, ys, z, keys[tri], owner)
+        if vertex_colors is not None:
+            color_buffer[ys[win], xs[win]] = interpolate_vertex_colors(
+                t, depth, vertex_colors, tri[win], w0[win], w1[win], w2[win])
+        elif face_colors is not None:
+            color_buffer[ys[win], xs[win]] = face_colors[tri[win]]
+        else:
+            color_buffer[ys[win], xs[win]] = color
+        if id_buffer is not None:
+            id_buffer[ys[win], xs[win]] = ids[tri[win]]
+    return color_buffer, depth_buffer
+
+# --- linhas e marcadores vetorizados (sobreposições de contorno/vértices) ---
+
+def clip_segments(x0, y0, x1, y1, width: int, height: int):
+    """
+    Recorte de Liang-Barsky vetorizado dos segmentos (arrays (K,)) contra a tela
+    [0, width-1] x [0, height-1]. Retorna (ids dos segmentos que sobram, x0, y0, x1, y1 recortados).
+    """
+    x0 = np.asarray(x0, dtype=np.float64); y0 = np.asarray(y0, dtype=np.float64)
+    x1 = np.asarray(x1, dtype=np.float64); y1 = np.asarray(y1, dtype=np.float64)
+    dx = x1 - x0; dy = y1 - y0
+    t0 = np.zeros(len(x0)); t1 = np.ones(len(x0))
+    keep = np.ones(len(x0), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0), (dx, (width - 1) - x0), (-dy, y0), (dy, (height - 1) - y0)):
+            keep &= ~((p == 0) & (q < 0))
+            r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    ids = np.flatnonzero(keep & (t0 <= t1))
+    t0 = t0[ids]; t1 = t1[ids]
+    return (ids, x0[ids] + t0 * dx[ids], y0[ids] + t0 * dy[ids],
+            x0[ids] + t1 * dx[ids], y0[ids] + t1 * dy[ids])
+
+def line_fragments(x0, y0, x1, y1, width: int, height: int,
+                   batch_samples: int = FRAGMENT_BATCH_SAMPLES):
+    """
+    Pixels dos segmentos (DDA vetorizado sobre os segmentos já recortados à tela), em lotes
+    de até 'batch_samples' pixels. Com extremos inteiros coincide com a reta de Bresenham
+    (uma amostra por passo no eixo dominante). Gera tuplas (seg, xs, ys).
+    """
+    ids, ax, ay, bx, by = clip_segments(x0, y0, x1, y1, width, height)
+    if ids.size == 0:
+        return
+    n = np.ceil(np.maximum(np.abs(bx - ax), np.abs(by - ay))).astype(np.int64) + 1
+    ends = np.cumsum(n)
+    start = 0
+    while start < len(ids):
+        base = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, base + batch_samples, side="right")))
+        seg = np.repeat(np.arange(start, stop), n[start:stop])
+        k = np.arange(len(seg)) - np.repeat(ends[start:stop] - n[start:stop] - base, n[start:stop])
+        t = k / np.maximum(n[seg] - 1, 1)
+        xs = np.rint(ax[seg] + t * (bx[seg] - ax[seg])).astype(np.int64)
+        ys = np.rint(ay[seg] + t * (by[seg] - ay[seg])).astype(np.int64)
+        yield ids[seg], xs, ys
+        start = stop
+
+def draw_lines(buffer: np.ndarray, x0, y0, x1, y1, value) -> np.ndarray:
+    """Desenha os segmentos (arrays (K,), em pixels) direto no buffer (height x width[, 3])."""
+    height, width = buffer.shape[:2]
+    for _, xs, ys in line_fragments(x0, y0, x1, y1, width, height):
+        buffer[ys, xs] = value
+    return buffer
 
-def rasterize_mesh(triangles: List[Tuple[int,int,int]],
-                   proj_results: List[Dict],
-                   width: int, height: int) -> Dict[int, Set[Pixel]]:
-    tri_pixels = {}
-    for ti, (a,b,c) in enumerate(triangles):
-        if a < 0 or b < 0 or c < 0:
-            tri_pixels[ti] = set(); continue
-        if a >= len(proj_results) or b >= len(proj_results) or c >= len(proj_results):
-            tri_pixels[ti] = set(); continue
-        ra = proj_results[a]; rb = proj_results[b]; rc = proj_results[c]
-        pa = ra.get("pixel", (None, None)); pb = rb.get("pixel", (None, None)); pc = rc.get("pixel", (None, None))
-        vis_a = ra.get("visible", False); vis_b = rb.get("visible", False); vis_c = rc.get("visible", False)
-        # Exigir projetáveis e visíveis (simplificação)
-        if pa[0] is None or pb[0] is None or pc[0] is None or not (vis_a and vis_b and vis_c):
-            tri_pixels[ti] = set()
-            continue
-        pixels = rasterize_triangle_pixels(pa, pb, pc, width, height)
-        tri_pixels[ti] = pixels
-    return tri_pixels
+def draw_points(buffer: np.ndarray, xs, ys, value, radius: int = 1) -> np.ndarray:
+    """Marcadores quadrados (2*radius+1)^2 centrados nos pontos (arrays (K,)), recortados à tela."""
+    height, width = buffer.shape[:2]
+    off = np.arange(-radius, radius + 1, dtype=np.int64)
+    X = (np.asarray(xs, dtype=np.int64)[:, None, None] + off[None, None, :]).repeat(len(off), axis=1)
+    Y = (np.asarray(ys, dtype=np.int64)[:, None, None] + off[None, :, None]).repeat(len(off), axis=2)
+    ok = (X >= 0) & (X < width) & (Y >= 0) & (Y < height)
+    buffer[Y[ok], X[ok]] = value
+    return buffer
 
 # --- utilitário Bresenham para desenhar arestas (contorno) ---
 def bresenham_line_pixels(x0, y0, x1, y1) -> List[Pixel]:
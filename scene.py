@@ -0,0 +1,221 @@
+# scene.py
+# Cena com várias cópias (instâncias) das malhas de formas/: cada malha é carregada uma vez e
+# posicionada por uma matriz de modelo 4x4 por instância.
+# Por frame: instâncias inteiras são descartadas pela esfera envolvente contra o frustum;
+# as restantes são transformadas (modelo + vista numa só matriz) em lote por malha e
+# projetadas numa única chamada vetorizada.
+from typing import Dict, List, Optional, Tuple
+import math
+import os
+
+import numpy as np
+
+import bvh
+import mesh_cache
+import perf
+import pipeline
+import projection
+import transform
+
+Scene = Dict[str, object]
+Vec3 = Tuple[float, float, float]
+
+def new_scene() -> Scene:
+    return {"meshes": {}, "spheres": {}, "instances": []}
+
+def model_matrix(translation: Vec3 = (0.0, 0.0, 0.0),
+                 rotation_deg: Vec3 = (0.0, 0.0, 0.0),
+                 scale: float = 1.0) -> np.ndarray:
+    """Matriz 4x4 objeto->mundo: escala uniforme, rotações em X, Y, Z (graus, nessa ordem) e translação."""
+    rx, ry, rz = (math.radians(a) for a in rotation_deg)
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    Rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    M = np.identity(4, dtype=np.float64)
+    M[:3, :3] = (Rz @ Ry @ Rx) * float(scale)
+    M[:3, 3] = translation
+    return M
+
+def add_mesh(scene: Scene, name: str, m) -> None:
+    """Registra a malha (uma vez) e sua esfera envolvente em coordenadas de objeto."""
+    bmin = np.asarray(m["bounds_min"], dtype=np.float64)
+    bmax = np.asarray(m["bounds_max"], dtype=np.float64)
+    scene["meshes"][name] = m
+    scene["spheres"][name] = (0.5 * (bmin + bmax), 0.5 * float(np.linalg.norm(bmax - bmin)))
+
+def add_instance(scene: Scene, name: str, model: Optional[np.ndarray] = None) -> int:
+    if name not in scene["meshes"]:
+        raise KeyError(f"Malha '{name}' não registrada na cena")
+    scene["instances"].append({"mesh": name,
+                               "model": np.identity(4) if model is None else np.asarray(model, dtype=np.float64)})
+    return len(scene["instances"]) - 1
+
+def load_scene(path: str, folder: str = "formas") -> Scene:
+    """
+    Lê um arquivo de cena. Cada linha (comentários com #):
+        nome  tx ty tz  [rx ry rz]  [escala]
+    'nome' é um .byu de 'folder'; cada malha é carregada uma única vez (cache binário),
+    não importa quantas instâncias a usem.
+    """
+    scene = new_scene()
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, raw in enumerate(f, start=1):
+            line = raw.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            name, vals = parts[0], [float(v) for v in parts[1:]]
+            if len(vals) not in (3, 4, 6, 7):
+                raise ValueError(f"{path}:{lineno}: esperado 'nome tx ty tz [rx ry rz] [escala]'")
+            translation = vals[:3]
+            rotation = vals[3:6] if len(vals) >= 6 else (0.0, 0.0, 0.0)
+            scale = vals[-1] if len(vals) in (4, 7) else 1.0
+            if name not in scene["meshes"]:
+                add_mesh(scene, name, mesh_cache.load_mesh_cached(os.path.join(folder, name + ".byu")))
+            add_instance(scene, name, model_matrix(translation, rotation, scale))
+    return scene
+
+def instance_spheres(scene: Scene) -> Tuple[np.ndarray, np.ndarray]:
+    """Centros (K,3) e raios (K,) das esferas envolventes das instâncias, em mundo."""
+    inst = scene["instances"]
+    if not inst:
+        return np.empty((0, 3)), np.empty(0)
+    models = np.stack([i["model"] for i in inst])
+    centers = np.stack([scene["spheres"][i["mesh"]][0] for i in inst])
+    radii = np.array([scene["spheres"][i["mesh"]][1] for i in inst])
+    world = np.einsum("kij,kj->ki", models[:, :3, :3], centers) + models[:, :3, 3]
+    # maior fator de escala da parte linear (norma das colunas)
+    scale = np.linalg.norm(models[:, :3, :3], axis=1).max(axis=1)
+    return world, radii * scale
+
+def scene_bounds(scene: Scene) -> Tuple[Vec3, float]:
+    """Esfera (centro, raio) que envolve todas as instâncias (para enquadrar a câmera)."""
+    centers, radii = instance_spheres(scene)
+    if len(centers) == 0:
+        return (0.0, 0.0, 0.0), 1.0
+    lo = (centers - radii[:, None]).min(axis=0)
+    hi = (centers + radii[:, None]).max(axis=0)
+    c = 0.5 * (lo + hi)
+    r = float((np.linalg.norm(centers - c, axis=1) + radii).max())
+    return tuple(float(x) for x in c), r
+
+def cull_instances(scene: Scene, basis, cam) -> np.ndarray:
+    """Índices das instâncias cuja esfera envolvente toca o frustum (teste em vista, vetorizado)."""
+    centers, radii = instance_spheres(scene)
+    if len(centers) == 0:
+        return np.empty(0, dtype=np.int64)
+    d = float(cam.get("d", 1.0))
+    if d <= 0.0 or float(cam.get("hx", 1.0)) <= 0.0 or float(cam.get("hy", 1.0)) <= 0.0:
+        return np.arange(len(centers))
+    view = transform.world_to_view_array(centers, basis)
+    dist = view @ bvh.frustum_planes(cam).T
+    return np.flatnonzero((dist <= radii[:, None]).all(axis=1))
+
+def gather(scene: Scene, cam, cull_backfaces: bool = False, stats=None,
+           normals: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Junta as instâncias visíveis num único lote em coordenadas de vista:
+      'view'        : float64 (N,3) vértices de todas as instâncias visíveis
+      'triangles'   : int64 (M,3)   índices em 'view'
+      'instance_ids': int64 (M,)    instância de cada triângulo
+      'source_triangles': int64 (M,) índice de cada triângulo na sua malha de origem
+      'edges', 'tri_edges'          arestas únicas por instância (mesmo formato de mesh.make_mesh)
+    Com normals=True também 'face_normals' (M,3) e 'vertex_normals' (N,3) em coordenadas de
+    vista (só a rotação de vista*modelo; o sinal não importa para a luz dos dois lados).
+    A transformação é feita por malha: as matrizes vista*modelo das k instâncias de uma malha
+    são aplicadas aos seus N vértices num só einsum (k,N,3).
+    """
+    basis = transform.compute_camera_basis(cam)
+    with perf.stage(stats, "culling"):
+        visible = cull_instances(scene, basis, cam)
+    inst = scene["instances"]
+    groups: Dict[str, List[int]] = {}
+    for i in visible.tolist():
+        groups.setdefault(inst[i]["mesh"], []).append(i)
+
+    views, tris, inst_ids, src_tris, edges, tri_edges, fnormals, vnormals = [], [], [], [], [], [], [], []
+    v_base = e_base = 0
+    with perf.stage(stats, "transformação"):
+        C = np.append(np.asarray(basis["C"], dtype=np.float64), 1.0)
+        for name, ids in groups.items():
+            m = scene["meshes"][name]
+            V, T = m["vertices"], np.asarray(m["triangles"], dtype=np.int64)
+            E, TE = m["edges"], m["tri_edges"]
+            models = np.stack([inst[i]["model"] for i in ids])
+            MV = basis["M"] @ models                                   # (k,4,4)
+            views.append((np.einsum("kij,nj->kni", MV[:, :3, :3], V) + MV[:, None, :3, 3]).reshape(-1, 3))
+            k, n, e = len(ids), len(V), len(E)
+            keep = np.ones((k, len(T)), dtype=bool)
+            keep &= ((T >= 0) & (T < n)).all(axis=1)
+            if cull_backfaces:
+                # câmera em coordenadas de objeto de cada instância: mesmo teste de mesh.backfacing
+                c_obj = np.einsum("kij,j->ki", np.linalg.inv(models), C)[:, :3]
+                side = m["face_normals"] @ c_obj.T - m["face_offsets"][:, None]   # (M,k)
+                flip = np.linalg.det(models[:, :3, :3]) < 0
+                back = np.where(flip[None, :], side >= 0.0, side <= 0.0) & m["face_normals"].any(axis=1)[:, None]
+                keep &= ~back.T
+            kk, tt = np.nonzero(keep)
+            tris.append(T[tt] + (v_base + kk * n)[:, None])
+            tri_edges.append(TE[tt] + (e_base + kk * e)[:, None])
+            edges.append((E[None, :, :] + (v_base + np.arange(k) * n)[:, None, None]).reshape(-1, 2))
+            inst_ids.append(np.asarray(ids, dtype=np.int64)[kk])
+            src_tris.append(tt)
+            if normals:
+                # escala uniforme: basta renormalizar depois da parte linear de vista*modelo
+                R = MV[:, :3, :3] / np.linalg.norm(MV[:, :3, :3], axis=1).max(axis=1)[:, None, None]
+                fnormals.append(np.einsum("mij,mj->mi", R[kk], m["face_normals"][tt]))
+                vnormals.append(np.einsum("kij,nj->kni", R, m["vertex_normals"]).reshape(-1, 3))
+            v_base += k * n
+            e_base += k * e
+
+    def cat(parts, shape, dtype):
+        return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(shape, dtype=dtype)
+
+    batch = {
+        "view": cat(views, (0, 3), np.float64),
+        "triangles": cat(tris, (0, 3), np.int64),
+        "instance_ids": cat(inst_ids, (0,), np.int64),
+        "source_triangles": cat(src_tris, (0,), np.int64),
+        "edges": cat(edges, (0, 2), np.int64),
+        "tri_edges": cat(tri_edges, (0, 3), np.int64),
+        "visible_instances": visible,
+    }
+    if normals:
+        batch["face_normals"] = cat(fnormals, (0, 3), np.float64)
+        batch["vertex_normals"] = cat(vnormals, (0, 3), np.float64)
+    if stats is not None:
+        perf.count(stats, "instâncias", len(inst))
+        perf.count(stats, "instâncias visíveis", len(visible))
+        perf.count(stats, "triângulos", len(batch["triangles"]))
+    return batch
+
+def render_scene(scene: Scene, cam, width: int, height: int, use_zbuffer: bool = False,
+                 cull_backfaces: bool = False, parallel: bool = False, shading: str = "none", stats=None,
+                 picking=None):
+    """
+    Frame da cena inteira. Retorna (framebuffer RGB, projeção, lote de gather) — o lote tem
+    'edges'/'tri_edges' e a projeção 'vertex_ids'/'triangle_ids', então serve de malha para
+    as sobreposições de main.draw_overlays. shading e picking como em pipeline.render_frame.
+    """
+    if shading not in pipeline.SHADING_MODES:
+        raise ValueError(f"Sombreamento desconhecido: {shading}")
+    batch = gather(scene, cam, cull_backfaces, stats, normals=shading != "none")
+    with perf.stage(stats, "projeção"):
+        proj = projection.world_view_to_screen_arrays(batch["view"], cam, width, height)
+    proj["vertex_ids"] = np.arange(len(batch["view"]))
+    proj["triangle_ids"] = np.arange(len(batch["triangles"]))
+    face_colors = vertex_colors = None
+    with perf.stage(stats, "sombreamento"):
+        if shading == "flat":
+            face_colors = np.rint(pipeline.shade_colors(batch["face_normals"])).astype(np.uint8)
+        elif shading == "gouraud":
+            vertex_colors = pipeline.shade_colors(batch["vertex_normals"])
+    with perf.stage(stats, "raster"):
+        framebuffer = pipeline.rasterize_frame(batch["triangles"], proj, width, height, use_zbuffer, parallel,
+                                               face_colors, vertex_colors, picking)
+    if stats is not None:
+        perf.count(stats, "pixels escritos", np.count_nonzero(framebuffer.any(axis=2)))
+    return framebuffer, proj, batch
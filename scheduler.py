@@ -0,0 +1,44 @@
+# scheduler.py
+# Agendamento de redesenho do loop principal: eventos só alteram o estado e marcam
+# o que ficou "sujo"; o frame é reconstruído no máximo uma vez por iteração (clock.tick),
+# já com todos os eventos pendentes aplicados.
+from typing import Dict, Set
+
+# níveis de sujeira
+FRAME = "frame"      # câmera/malha/modo mudou: transformar, projetar e rasterizar de novo
+OVERLAY = "overlay"  # só sobreposições/painéis mudaram: recompor sem rasterizar
+
+Scheduler = Dict[str, object]
+
+def new_scheduler() -> Scheduler:
+    return {
+        "dirty": {FRAME},          # primeiro frame sempre desenhado
+        "events": 0,               # eventos recebidos
+        "applied": 0,              # eventos que mudaram estado
+        "coalesced": 0,            # eventos absorvidos por outro do mesmo tick (ex.: MOUSEMOTION)
+        "dropped": 0,              # eventos que não mudaram nada
+        "renders": 0,              # frames efetivamente redesenhados
+        "ticks": 0,                # iterações do loop
+    }
+
+def mark_dirty(sched: Scheduler, what: str = FRAME):
+    sched["dirty"].add(what)
+
+def count_event(sched: Scheduler, outcome: str):
+    """outcome ∈ {'applied', 'coalesced', 'dropped'}"""
+    sched["events"] += 1
+    sched[outcome] += 1
+
+def take_dirty(sched: Scheduler) -> Set[str]:
+    """Retorna o que precisa ser redesenhado neste tick e limpa as marcas."""
+    sched["ticks"] += 1
+    dirty = sched["dirty"]
+    sched["dirty"] = set()
+    if dirty:
+        sched["renders"] += 1
+    return dirty
+
+def summary(sched: Scheduler) -> str:
+    return (f"eventos: {sched['events']} (aplicados {sched['applied']}, "
+            f"agrupados {sched['coalesced']}, descartados {sched['dropped']}) | "
+            f"frames desenhados: {sched['renders']} em {sched['ticks']} ticks")
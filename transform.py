@@ -2,6 +2,8 @@
 from typing import Tuple, List, Dict
 import math
 
+import numpy as np
+
 Vec3 = Tuple[float, float, float]
 Camera = Dict[str, object]
 
@@ -36,6 +38,23 @@ def cross(a: Vec3, b: Vec3) -> Vec3:
 def is_zero_vec(v: Vec3) -> bool:
     return length(v) < EPS
 
+# --- órbita em coordenadas esféricas em torno de um ponto (az em torno de Y, el a partir do plano XZ) ---
+
+def cartesian_from_spherical(r, az, el):
+    x = r * math.cos(el) * math.sin(az)
+    y = r * math.sin(el)
+    z = r * math.cos(el) * math.cos(az)
+    return (x, y, z)
+
+def spherical_from_cartesian(v):
+    x, y, z = v
+    r = math.sqrt(x*x + y*y + z*z)
+    if r == 0:
+        return (0.0, 0.0, 0.0)
+    az = math.atan2(x, z)
+    el = math.asin(y / r)
+    return (r, az, el)
+
 def compute_camera_basis(camera: Camera) -> Dict[str, Vec3]:
     """
     Recebe dict camera com chaves:
@@ -47,6 +66,8 @@ def compute_camera_basis(camera: Camera) -> Dict[str, Vec3]:
       - 'u': eixo X da câmera (direita)
       - 'v': eixo Y da câmera (up)
       - 'n': eixo Z da câmera (forward)
+      - 'M': matriz de vista 4x4 (np.ndarray float64), linhas u, v, n e translação -C
+             -> [Xv, Yv, Zv, 1] = M @ [X, Y, Z, 1]
     Procedimento (Gram-Schmidt-like):
       1) n = normalize(N)
       2) v' = V - (V·n) n
@@ -97,7 +118,16 @@ def compute_camera_basis(camera: Camera) -> Dict[str, Vec3]:
     v_final = cross(u, n)
     v_final = normalize(v_final)
 
-    return {"C": C, "u": u, "v": v_final, "n": n}
+    return {"C": C, "u": u, "v": v_final, "n": n, "M": view_matrix(C, u, v_final, n)}
+
+def view_matrix(C: Vec3, u: Vec3, v: Vec3, n: Vec3) -> np.ndarray:
+    """Matriz 4x4 mundo->vista: rotação (linhas u, v, n) composta com a translação por -C."""
+    M = np.identity(4, dtype=np.float64)
+    M[0, :3] = u
+    M[1, :3] = v
+    M[2, :3] = n
+    M[:3, 3] = -(M[:3, :3] @ np.asarray(C, dtype=np.float64))
+    return M
 
 def world_to_view_point(P: Vec3, basis: Dict[str, Vec3]) -> Vec3:
     """
@@ -116,8 +146,18 @@ def world_to_view_point(P: Vec3, basis: Dict[str, Vec3]) -> Vec3:
     z_v = dot(Pv, n)
     return (x_v, y_v, z_v)
 
+def world_to_view_array(vertices, basis: Dict[str, object]) -> np.ndarray:
+    """
+    Versão em lote: aplica a matriz de vista basis['M'] a todos os vértices (N,3) de uma vez.
+    Retorna array float64 (N,3) com (Xv, Yv, Zv) por linha.
+    """
+    M = basis["M"]
+    P = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    return P @ M[:3, :3].T + M[:3, 3]
+
 def world_to_view_vertices(vertices: List[Vec3], basis: Dict[str, Vec3]) -> List[Vec3]:
-    return [world_to_view_point(p, basis) for p in vertices]
+    # mesma saída de antes (lista de tuplas), mas calculada pela transformação em lote
+    return [tuple(p) for p in world_to_view_array(vertices, basis).tolist()]
 
 
 # função de teste rápido
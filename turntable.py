@@ -0,0 +1,215 @@
+# turntable.py
+# Animação sem janela: a câmera orbita o centroide da malha (volta completa em N quadros ou
+# caminho por quadros-chave) e os frames saem como sequência de PNGs ou RGB cru num pipe.
+# Renderização e codificação/escrita rodam em estágios separados ligados por uma fila
+# limitada: enquanto um frame é comprimido/gravado (zlib e write liberam o GIL), o próximo
+# já está sendo renderizado; a fila cheia segura o renderizador (memória limitada).
+#
+# Uso:
+#   python turntable.py maca --frames 120 --out frames
+#   python turntable.py formas/vaso.byu --keyframes caminho.txt --out frames
+#   python turntable.py maca --raw - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 30 -i - maca.mp4
+#
+# Quadros-chave (um por linha, comentários com #):  quadro  azimute  elevação  [distância]
+# ângulos em graus, relativos à posição da câmera de --camera; distância multiplica a original.
+import argparse
+import math
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+
+import camera
+import image_io
+import mesh_cache
+import pipeline
+from transform import cartesian_from_spherical, spherical_from_cartesian
+
+QUEUE_FRAMES = 8  # frames em espera entre renderização e escrita
+
+def load_keyframes(path: str) -> np.ndarray:
+    """Quadros-chave (K,4): quadro, azimute (graus), elevação (graus), fator de distância."""
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, raw in enumerate(f, start=1):
+            line = raw.split("#", 1)[0].strip()
+            if not line:
+                continue
+            vals = [float(v) for v in line.split()]
+            if len(vals) not in (3, 4):
+                raise ValueError(f"{path}:{lineno}: esperado 'quadro azimute elevação [distância]'")
+            rows.append(vals if len(vals) == 4 else vals + [1.0])
+    if not rows:
+        raise ValueError(f"{path}: nenhum quadro-chave")
+    keys = np.array(sorted(rows), dtype=np.float64)
+    return keys
+
+def orbit_path(n_frames: int, turns: float = 1.0, keyframes: np.ndarray = None):
+    """
+    (azimute, elevação, fator de distância) por quadro, em radianos relativos à câmera inicial.
+    Sem quadros-chave: 'turns' voltas completas em azimute, elevação constante.
+    Com quadros-chave: interpolação linear entre eles (constante fora do intervalo).
+    """
+    f = np.arange(n_frames, dtype=np.float64)
+    if keyframes is None:
+        az = 2.0 * math.pi * turns * f / max(n_frames, 1)
+        return np.stack((az, np.zeros(n_frames), np.ones(n_frames)), axis=1)
+    k = keyframes
+    return np.stack((np.radians(np.interp(f, k[:, 0], k[:, 1])),
+                     np.radians(np.interp(f, k[:, 0], k[:, 2])),
+                     np.interp(f, k[:, 0], k[:, 3])), axis=1)
+
+def orbit_cameras(cam, centroid, path):
+    """Câmeras (dicts) olhando para o centroide, na órbita descrita por path (saída de orbit_path)."""
+    r0, az0, el0 = spherical_from_cartesian(tuple(np.subtract(cam["C"], centroid)))
+    lim = math.radians(89.0)
+    for daz, del_, scale in path.tolist():
+        el = max(-lim, min(lim, el0 + del_))
+        C = tuple(np.add(centroid, cartesian_from_spherical(r0 * scale, az0 + daz, el)).tolist())
+        c = dict(cam)
+        c["C"] = C
+        c["N"] = tuple(np.subtract(centroid, C).tolist())
+        yield c
+
+# ------------------------------------------------------------------ estágio de escrita
+
+class _Writer(threading.Thread):
+    """Consumidor: tira (índice, framebuffer) da fila e grava como PNG ou RGB cru."""
+
+    def __init__(self, frames: "queue.Queue", out_dir: str, prefix: str, raw_stream, compress_level: int):
+        super().__init__(name="turntable-writer", daemon=True)
+        self.frames = frames
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.raw_stream = raw_stream
+        self.compress_level = compress_level
+        self.busy_s = 0.0
+        self.written = 0
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self.frames.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue  # drena a fila para não travar o produtor
+            i, fb = item
+            t0 = time.perf_counter()
+            try:
+                if self.raw_stream is not None:
+                    self.raw_stream.write(np.ascontiguousarray(fb).tobytes())
+                else:
+                    path = os.path.join(self.out_dir, f"{self.prefix}_{i:04d}.png")
+                    image_io.write_png(path, fb, self.compress_level)
+                self.written += 1
+            except Exception as e:  # noqa: BLE001 - repassado ao produtor
+                self.error = e
+            self.busy_s += time.perf_counter() - t0
+
+def render_animation(m, cams, width: int, height: int, out_dir: str = None, raw_stream=None,
+                     prefix: str = "frame", use_zbuffer: bool = False, cull_backfaces: bool = False,
+                     shading: str = "none",
+                     queue_frames: int = QUEUE_FRAMES, compress_level: int = 6, log=sys.stdout):
+    """
+    Renderiza os frames das câmeras 'cams' (thread atual) e entrega a um escritor em outra
+    thread via fila limitada. Retorna dict com contagem e tempos (render, escrita, espera).
+    """
+    frames = queue.Queue(maxsize=max(1, queue_frames))
+    writer = _Writer(frames, out_dir, prefix, raw_stream, compress_level)
+    writer.start()
+    render_s = wait_s = 0.0
+    n = 0
+    t_start = time.perf_counter()
+    try:
+        for i, cam in enumerate(cams):
+            if writer.error is not None:
+                break
+            t0 = time.perf_counter()
+            fb, _, _ = pipeline.render_frame(m, cam, width, height, use_zbuffer=use_zbuffer,
+                                             cull_backfaces=cull_backfaces, shading=shading)
+            t1 = time.perf_counter()
+            frames.put((i, fb))  # bloqueia com a fila cheia: escrita é o gargalo
+            wait_s += time.perf_counter() - t1
+            render_s += t1 - t0
+            n += 1
+            if n % 30 == 0:
+                print(f"  {n} frames ({n / (time.perf_counter() - t_start):.1f} fps)", file=log)
+    finally:
+        frames.put(None)
+        writer.join()
+    if raw_stream is not None:
+        raw_stream.flush()
+    if writer.error is not None:
+        raise writer.error
+    total = time.perf_counter() - t_start
+    return {"frames": writer.written, "total_s": total, "render_s": render_s,
+            "write_s": writer.busy_s, "wait_s": wait_s}
+
+def _resolve_mesh(arg: str, folder: str = "formas") -> str:
+    if os.path.isfile(arg):
+        return arg
+    path = os.path.join(folder, arg + ".byu")
+    if os.path.isfile(path):
+        return path
+    raise FileNotFoundError(f"Malha não encontrada: {arg} (nem {path})")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Animação turntable/caminho de câmera sem janela.")
+    ap.add_argument("mesh", help="arquivo .byu ou nome de uma malha em formas/")
+    ap.add_argument("--camera", default="camera.txt", help="câmera inicial (define distância e ângulos de partida)")
+    ap.add_argument("--frames", type=int, default=None, help="número de quadros (padrão: 72, ou até o último quadro-chave)")
+    ap.add_argument("--turns", type=float, default=1.0, help="voltas em azimute (sem --keyframes)")
+    ap.add_argument("--keyframes", help="arquivo de quadros-chave: quadro azimute elevação [distância]")
+    sink = ap.add_mutually_exclusive_group()
+    sink.add_argument("--out", default="frames", help="pasta da sequência PNG")
+    sink.add_argument("--raw", metavar="ARQ", help="grava RGB24 cru em ARQ ('-' = stdout, para ffmpeg)")
+    ap.add_argument("--width", type=int, default=800)
+    ap.add_argument("--height", type=int, default=600)
+    ap.add_argument("--zbuffer", action="store_true", help="renderizar com z-buffer")
+    cull = ap.add_mutually_exclusive_group()
+    cull.add_argument("--cull", dest="cull", action="store_true", default=None, help="forçar back-face culling")
+    cull.add_argument("--no-cull", dest="cull", action="store_false", help="desligar back-face culling")
+    ap.add_argument("--shading", choices=pipeline.SHADING_MODES, default="none",
+                    help="sombreamento com luz direcional (flat por face, Gouraud por vértice)")
+    ap.add_argument("--queue", type=int, default=QUEUE_FRAMES, help="tamanho da fila entre render e escrita")
+    ap.add_argument("--compress", type=int, default=6, help="nível zlib dos PNGs (0-9)")
+    args = ap.parse_args(argv)
+
+    # com RGB no stdout, mensagens vão para o stderr
+    log = sys.stderr if args.raw == "-" else sys.stdout
+    path = _resolve_mesh(args.mesh)
+    m = mesh_cache.load_mesh_cached(path)
+    cam = camera.load_camera(args.camera)
+    keys = load_keyframes(args.keyframes) if args.keyframes else None
+    n_frames = args.frames or (int(keys[-1, 0]) + 1 if keys is not None else 72)
+    cams = orbit_cameras(cam, m["centroid"], orbit_path(n_frames, args.turns, keys))
+    cull = m["closed"] if args.cull is None else args.cull
+    prefix = os.path.splitext(os.path.basename(path))[0]
+
+    raw_stream = None
+    if args.raw:
+        raw_stream = sys.stdout.buffer if args.raw == "-" else open(args.raw, "wb")
+        dest = "stdout" if args.raw == "-" else args.raw
+    else:
+        os.makedirs(args.out, exist_ok=True)
+        dest = args.out
+    print(f"Renderizando {n_frames} quadros de '{prefix}' ({args.width}x{args.height}) -> {dest}", file=log)
+    try:
+        res = render_animation(m, cams, args.width, args.height, out_dir=args.out, raw_stream=raw_stream,
+                               prefix=prefix, use_zbuffer=args.zbuffer, cull_backfaces=cull, shading=args.shading,
+                               queue_frames=args.queue, compress_level=args.compress, log=log)
+    finally:
+        if raw_stream is not None and args.raw != "-":
+            raw_stream.close()
+    n = res["frames"]
+    print(f"Concluído: {n} quadros em {res['total_s']:.2f}s ({n / res['total_s']:.1f} fps) | "
+          f"render {res['render_s']:.2f}s ({n / max(res['render_s'], 1e-9):.1f} fps), "
+          f"escrita {res['write_s']:.2f}s, render esperando a fila {res['wait_s']:.2f}s", file=log)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
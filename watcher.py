@@ -0,0 +1,88 @@
+# watcher.py
+# Observador de arquivos por polling (só biblioteca padrão, funciona em qualquer SO):
+# a cada 'interval' segundos lista a pasta de malhas (os.scandir) e faz stat dos arquivos
+# avulsos (ex.: camera.txt), comparando (mtime_ns, tamanho) com a última varredura.
+# Nada é lido nem reparseado aqui — só se informa o que mudou.
+# Uma mudança só é reportada depois que a assinatura fica estável por uma varredura inteira,
+# para não pegar um arquivo ainda sendo copiado para a pasta.
+from typing import Dict, Iterable, List, Optional, Tuple
+import fnmatch
+import os
+import time
+
+Watcher = Dict[str, object]
+Signature = Tuple[int, int]
+
+POLL_INTERVAL_S = 0.5
+
+def _signature(path: str) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _scan(w: Watcher) -> Dict[str, Signature]:
+    found = {}
+    folder = w["folder"]
+    if folder and os.path.isdir(folder):
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_file() and fnmatch.fnmatch(entry.name, w["pattern"]):
+                    st = entry.stat()
+                    found[entry.path] = (st.st_mtime_ns, st.st_size)
+    for path in w["files"]:
+        sig = _signature(path)
+        if sig is not None:
+            found[path] = sig
+    return found
+
+def new_watcher(folder: str = "formas", pattern: str = "*.byu", files: Iterable[str] = (),
+                interval: float = POLL_INTERVAL_S) -> Watcher:
+    w = {
+        "folder": folder,
+        "pattern": pattern,
+        "files": list(files),
+        "interval": interval,
+        "last_poll": time.monotonic(),
+        "known": {},    # caminho -> assinatura já reportada
+        "pending": {},  # caminho -> assinatura vista uma vez (aguardando estabilizar)
+    }
+    w["known"] = _scan(w)
+    return w
+
+def poll(w: Watcher, force: bool = False) -> Optional[Dict[str, List[str]]]:
+    """
+    Varre se o intervalo passou (ou force). Retorna None se nada mudou, senão
+    {'added': [...], 'removed': [...], 'changed': [...]} com caminhos.
+    """
+    now = time.monotonic()
+    if not force and now - w["last_poll"] < w["interval"]:
+        return None
+    w["last_poll"] = now
+    current = _scan(w)
+    known, pending = w["known"], w["pending"]
+    changes = {"added": [], "removed": [], "changed": []}
+
+    for path in [p for p in known if p not in current]:
+        del known[path]
+        pending.pop(path, None)
+        changes["removed"].append(path)
+    for path, sig in current.items():
+        if known.get(path) == sig:
+            pending.pop(path, None)
+            continue
+        if pending.get(path) != sig:
+            pending[path] = sig  # primeira vez com essa assinatura: espera a próxima varredura
+            continue
+        del pending[path]
+        changes["added" if path not in known else "changed"].append(path)
+        known[path] = sig
+    for path in [p for p in pending if p not in current]:
+        del pending[path]
+
+    if not any(changes.values()):
+        return None
+    for key in changes:
+        changes[key].sort()
+    return changes